@@ -0,0 +1,388 @@
+"""
+A vectorized Uno engine that plays a batch of games in lockstep with numpy. Every game
+is kept as rows of arrays: hand-count matrices over the card codes of environment.py,
+a draw pile and a discard pile of card codes and the open card. One call of
+BatchGame.step() advances all running games by one turn.
+
+The rules follow environment.Game: the second player opens, a player without playable
+card draws one card, +2 and +4 cards are countered as long as the opponent holds one,
+the side that is left without counter draws the sum and, if that is the active player,
+plays again. A REV card gives another turn, a SKI card does not, as in Game.
+Where Game depends on the order of the hand cards, ties are broken randomly instead.
+
+Supported policies are the random player (None) and the gravity score of the
+StrategicAgent (any agent with the parameter list 'h').
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+
+# Public libraries
+import numpy as np
+import time
+
+
+# 2. Card tables
+# -------------------------------------------------------------------------
+
+N_CODES = len(uno.COLORS)*16
+PL2 = uno.VALUE_CODE["PL2"]
+PL4 = uno.VALUE_CODE["PL4"]
+REV = uno.VALUE_CODE["REV"]
+WILD = uno.COLOR_CODE["WILD"]
+
+DECK_CODES = np.frombuffer(uno.DECK_CODES, dtype = np.uint8)
+
+# PLAYABLE[open, card] tells if card may be played on open
+PLAYABLE = np.array([[(uno.CARDS[c] is not None) and uno.CARDS[c].evaluate_card(o)
+                      for c in range(N_CODES)] for o in range(N_CODES)], dtype = bool)
+
+CODE_COLOR = np.arange(N_CODES) >> 4
+CODE_VALUE = np.arange(N_CODES) & 15
+IS_WILD    = CODE_VALUE >= PL4
+
+# The 54 distinct cards of the deck, policies only score these codes
+TYPES       = np.unique(DECK_CODES).astype(np.int64)
+TYPE_COLOR  = CODE_COLOR[TYPES]
+TYPE_VALUE  = CODE_VALUE[TYPES]
+TYPE_WILD   = IS_WILD[TYPES]
+
+# Index into the strategic parameters of the special weight of each value (see getSpecWeight)
+SPEC_INDEX = {uno.VALUE_CODE[v]: i for v, i in [("SKI",2), ("REV",4), ("PL2",6), ("PL4",8), ("COL",10)]}
+
+
+# 3. Batch Game
+# -------------------------------------------------------------------------
+
+class BatchGame(object):
+    """
+    A batch of n games between two agents. seat_1 holds for each game the seat (0 for
+    player_1, 1 for player_2) of the first agent, the second agent takes the other seat.
+    After play(), winner holds the index of the winning agent and turn_no the turns of
+    each game, counted as in Game.
+    """
+
+    def __init__(self, n, agents, seat_1, rng):
+        self.n      = n
+        self.rng    = rng
+        self.agents = agents
+        self.seat_1 = np.asarray(seat_1, dtype = np.int8)
+
+        self.hands  = np.zeros((n, 2, N_CODES), dtype = np.int16)
+        self.size   = np.zeros((n, 2), dtype = np.int16)
+        self.deck   = np.tile(DECK_CODES, (n, 1))
+        self.n_deck = np.full(n, len(DECK_CODES), dtype = np.int16)
+        self.disc   = np.zeros((n, len(DECK_CODES)), dtype = np.uint8)
+        self.n_disc = np.zeros(n, dtype = np.int16)
+        self.open   = np.zeros(n, dtype = np.int16)
+        self.top    = np.full(n, -1, dtype = np.int16)
+
+        self.turn_no = np.zeros(n, dtype = np.int32)
+        self.winner  = np.full(n, -1, dtype = np.int8)
+        self.done    = np.zeros(n, dtype = bool)
+
+        # Domain knowledge of strategic agents per game and seat (see StrategicAgent.step)
+        self.seen_color = np.zeros((n, 2, 16), dtype = np.int32)
+        self.seen_value = np.zeros((n, 2, 16), dtype = np.int32)
+        self.card_count = np.zeros((n, 2), dtype = np.int32)
+
+        self.start_up()
+
+
+    def start_up(self):
+        """
+        Shuffles all decks, turns up the first normal card from the top as open card and
+        deals 7 cards to each player, player_1 first. Cards turned up before the first
+        normal card leave the game, as in Turn.start_up.
+        """
+
+        games = np.arange(self.n)
+        self.deck = self.shuffled(self.deck, np.full(self.n, len(DECK_CODES)))
+
+        normal = (self.deck & 15) < 10
+        top    = len(DECK_CODES) - 1 - np.argmax(normal[:, ::-1], axis = 1)
+        self.open   = self.deck[games, top].astype(np.int16)
+        self.n_deck = top.astype(np.int16)
+
+        for i in range(7):
+            for seat in [0, 1]:
+                self.draw(games, np.full(self.n, seat), 1)
+
+
+    def shuffled(self, cards, lengths):
+        """
+        Returns the rows of cards with their first lengths entries shuffled in place.
+        """
+
+        keys = self.rng.random(cards.shape)
+        keys[np.arange(cards.shape[1]) >= lengths[:, None]] = 2
+        return np.take_along_axis(cards, np.argsort(keys, axis = 1), axis = 1)
+
+
+    def draw(self, games, seats, count):
+        """
+        Every game in games draws count cards (scalar or per game) to the hand of seats.
+        An empty draw pile is replaced by the shuffled discard pile except the open card,
+        which stays on the discard pile, with both empty no card is drawn.
+        """
+
+        count = np.broadcast_to(count, games.shape)
+        for k in range(int(count.max()) if len(games) else 0):
+            g, s = games[count > k], seats[count > k]
+
+            # Reshuffle the discard pile into the draw pile
+            empty = g[self.n_deck[g] == 0]
+            if len(empty):
+                # Swap the open card to the end of the discard pile, out of the shuffle
+                e, top = empty[self.top[empty] >= 0], self.top[empty][self.top[empty] >= 0]
+                last = self.n_disc[e] - 1
+                open_card = self.disc[e, top]
+                self.disc[e, top] = self.disc[e, last]
+                self.n_disc[e] -= 1
+
+                self.deck[empty] = self.shuffled(self.disc[empty], self.n_disc[empty])
+                self.n_deck[empty] = self.n_disc[empty]
+                self.n_disc[empty] = 0
+
+                self.disc[e, 0] = open_card
+                self.n_disc[e] = 1
+                self.top[e] = 0
+
+            has = self.n_deck[g] > 0
+            g, s = g[has], s[has]
+            self.n_deck[g] -= 1
+            self.hands[g, s, self.deck[g, self.n_deck[g]]] += 1
+            self.size[g, s] += 1
+
+
+    def discard(self, games, codes):
+        self.disc[games, self.n_disc[games]] = codes
+        self.n_disc[games] += 1
+
+
+    def choose_color(self, hands):
+        """
+        Majority color of the colored cards in each hand, ties are broken randomly.
+        """
+
+        colors = hands[:, :64].reshape(-1, 4, 16).sum(axis = 2)
+        noise  = self.rng.random(colors.shape)
+        return np.argmax(colors + noise*(colors == colors.max(axis = 1, keepdims = True)), axis = 1)
+
+
+    def choose_card(self, games, seats, hands, playable, color):
+        """
+        Chooses the card code each active player plays by the policy of its agent.
+        """
+
+        card = np.zeros(len(games), dtype = np.int64)
+        agent_1 = self.seat_1[games] == seats
+
+        for agent, mask in [(self.agents[0], agent_1), (self.agents[1], ~agent_1)]:
+            if not mask.any():
+                continue
+
+            if agent is None:
+                card[mask] = self.random_policy(hands[mask], playable[mask])
+            else:
+                card[mask] = self.gravity_policy(agent.h, games[mask], seats[mask], hands[mask],
+                                                 playable[mask], color[mask])
+
+        return card
+
+
+    def random_policy(self, hands, playable):
+        """
+        Plays a random playable card, each card in hand is equally likely (see play_rand).
+        """
+
+        weights = np.cumsum((hands*playable)[:, TYPES], axis = 1)
+        r = self.rng.random(len(hands)) * weights[:, -1]
+        return TYPES[np.argmax(weights > r[:, None], axis = 1)]
+
+
+    def gravity_policy(self, h, games, seats, hands, playable, color):
+        """
+        Plays the playable card with the highest gravity score (see StrategicAgent.getGravity).
+        Wild cards are scored for the chosen color and count themselves for that color.
+        """
+
+        # Count open card
+        open_card = self.open[games]
+        self.seen_color[games, seats, open_card >> 4] += 1
+        self.seen_value[games, seats, open_card & 15] += 1
+        self.card_count[games, seats] += 1
+
+        rows   = np.arange(len(games))
+        colors = hands.reshape(-1, 5, 16).sum(axis = 2)
+        colors[:, WILD] = 0
+        values = hands.reshape(-1, 5, 16).sum(axis = 1)
+        seen_color = self.seen_color[games, seats]
+        seen_value = self.seen_value[games, seats]
+
+        x = colors[:, TYPE_COLOR]
+        x[:, TYPE_WILD] = colors[rows, color][:, None] + 1
+        y = values[:, TYPE_VALUE]
+        a = 1 + seen_color[:, TYPE_COLOR]
+        a[:, TYPE_WILD] = 1 + seen_color[rows, color][:, None]
+        b = 1 + seen_value[:, TYPE_VALUE]
+
+        score = h[0]*x*a + h[1]*y*b
+        n = self.card_count[games, seats][:, None]
+        for v, i in SPEC_INDEX.items():
+            spec = TYPE_VALUE == v
+            score[:, spec] += h[i] + h[i+1]*n
+
+        return TYPES[np.argmax(np.where(playable[:, TYPES], score, -np.inf), axis = 1)]
+
+
+    def step(self):
+        """
+        Plays one turn in every running game.
+        """
+
+        g = np.flatnonzero(~self.done)
+        self.turn_no[g] += 1
+        act = np.where(self.turn_no[g] % 2 == 0, 0, 1)
+        opp = 1 - act
+
+        # (1) Draw a card when no card is playable
+        playable = (self.hands[g, act] > 0) & PLAYABLE[self.open[g]]
+        none = ~playable.any(axis = 1)
+        if none.any():
+            self.draw(g[none], act[none], 1)
+            playable[none] = (self.hands[g[none], act[none]] > 0) & PLAYABLE[self.open[g[none]]]
+
+        # (2) Play a card
+        has = playable.any(axis = 1)
+        g, act, opp, playable = g[has], act[has], opp[has], playable[has]
+        hands = self.hands[g, act]
+        color = self.choose_color(hands)
+        card  = self.choose_card(g, act, hands, playable, color)
+
+        self.hands[g, act, card] -= 1
+        self.size[g, act] -= 1
+        self.discard(g, card)
+        self.top[g] = self.n_disc[g] - 1
+        self.open[g] = np.where(IS_WILD[card], color*16 + CODE_VALUE[card], card)
+
+        won = self.size[g, act] == 0
+        self.finish(g[won], act[won])
+        g, act, opp, card = g[~won], act[~won], opp[~won], card[~won]
+
+        # (3) Counter plus cards
+        again = CODE_VALUE[card] == REV
+        for value, penalty in [(PL2, 2), (PL4, 4)]:
+            plus = CODE_VALUE[card] == value
+            count = self.action_plus(g[plus], act[plus], opp[plus], value, penalty)
+            again[plus] = (count > 0) & (count % 2 == 0)
+
+        self.turn_no[g[again]] -= 1
+
+
+    def action_plus(self, g, act, opp, value, penalty):
+        """
+        Resolves a chain of plus cards in closed form: the opponent counters first and
+        the chain goes on while the side to counter holds a card of the same value.
+        Returns the length of the chain per game, 0 where a counter won the game.
+        """
+
+        codes = [c*16 + value for c in range(4)] if value == PL2 else [WILD*16 + value]
+        held_opp = self.hands[g][:, :, codes].sum(axis = 2)[np.arange(len(g)), opp]
+        held_act = self.hands[g][:, :, codes].sum(axis = 2)[np.arange(len(g)), act]
+
+        n_opp = np.minimum(held_opp, held_act + 1)
+        n_act = np.minimum(held_opp, held_act)
+        steps = n_opp + n_act
+
+        # A side that empties its hand with a counter wins on the spot
+        size_opp = self.size[g, opp].astype(np.int64)
+        size_act = self.size[g, act].astype(np.int64)
+        never = np.iinfo(np.int64).max
+        win_opp = np.where(size_opp <= n_opp, 2*size_opp - 1, never)
+        win_act = np.where(size_act <= n_act, 2*size_act, never)
+        end = np.minimum(steps, np.minimum(win_opp, win_act))
+
+        self.counter(g, opp, codes, (end + 1) // 2)
+        self.counter(g, act, codes, end // 2)
+
+        won_opp, won_act = end == win_opp, end == win_act
+        self.finish(g[won_opp], opp[won_opp])
+        self.finish(g[won_act], act[won_act])
+
+        count = 1 + end
+        rest  = ~(won_opp | won_act)
+        drawer = np.where(count % 2 == 0, act, opp)
+        self.draw(g[rest], drawer[rest], (count*penalty)[rest])
+
+        return np.where(rest, count, 0)
+
+
+    def counter(self, g, seats, codes, plays):
+        """
+        Removes plays counter cards from the hands of seats and discards them.
+        """
+
+        left = plays.copy()
+        for code in codes:
+            take = np.minimum(left, self.hands[g, seats, code])
+            self.hands[g, seats, code] -= take
+            self.size[g, seats] -= take
+            left -= take
+
+            for k in range(int(take.max()) if len(g) else 0):
+                self.discard(g[take > k], code)
+
+
+    def finish(self, g, seats):
+        self.done[g] = True
+        self.winner[g] = np.where(self.seat_1[g] == seats, 0, 1)
+
+
+    def play(self):
+        while not self.done.all():
+            self.step()
+
+
+# 4. Batch Tournament
+# -------------------------------------------------------------------------
+
+def batch_tournament(iterations, agent1, agent2, seed=None, batch_size=10000):
+    """
+    Plays a tournament with the batch engine and returns winners, turns and time like
+    environment.tournament. Seats alternate with the game number as in tournament.
+    Agents are None for a random player or strategic agents.
+    Required parameters:
+        - iterations as int
+        - agent1, agent2 as StrategicAgent or None
+    Optional parameters:
+        - seed as int
+        - batch_size as int, number of games played in lockstep
+    """
+
+    for agent in [agent1, agent2]:
+        if (agent is not None) and not hasattr(agent, "h"):
+            raise ValueError(f'{agent.name} is not supported by the batch engine')
+
+    timer_start = time.time()
+
+    rng = np.random.default_rng(seed)
+    names = [agent.name if agent is not None else "Random" for agent in [agent1, agent2]]
+    winners, turns = list(), list()
+
+    for start in range(0, iterations, batch_size):
+        i = np.arange(start, min(start + batch_size, iterations))
+        batch = BatchGame(len(i), [agent1, agent2], np.where(i % 2 == 1, 0, 1), rng)
+        batch.play()
+
+        winners.extend(names[w] for w in batch.winner)
+        turns.extend(batch.turn_no.tolist())
+
+    # Timer
+    timer_end = time.time()
+    timer = timer_end - timer_start
+
+    return winners, turns, timer
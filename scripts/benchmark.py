@@ -0,0 +1,189 @@
+"""
+Benchmarks of the game engine, the agents, the Q-model and the genetic search under fixed
+seeds. The results are written as JSON, so that runs of different commits on the same
+hardware can be compared:
+
+    python benchmark.py --out ../assets/benchmarks/<name>.json
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+import genetic_search as genetic
+import q_learning_agent as qagent
+import state_action_reward as sar
+import strategy_agent as sagent
+from q_table import QTable
+
+# Public libraries
+import numpy as np
+import argparse
+import datetime
+import platform
+import subprocess
+import tempfile
+import random
+import json
+import time
+import sys
+import os
+
+
+# 2. Benchmarks
+# -------------------------------------------------------------------------
+
+def q_agent(learn):
+    return qagent.QLearningAgent({"epsilon": .1, "gamma": .2, "alpha": 0, "model": None, "learn": learn})
+
+
+def strategic_agent():
+    return sagent.StrategicAgent({"model": "../assets/models/strat_unopt/model", "parameters": None})
+
+
+def tournament_throughput(games, agent1, agent2, seed):
+    """
+    Plays a seeded tournament and returns games and turns per second.
+    """
+
+    winners, turns, timer = uno.tournament(games, agent1, agent2, False, seed)
+
+    return {"games"        : games,
+            "turns"        : sum(turns),
+            "seconds"      : timer,
+            "games_per_sec": games / timer,
+            "turns_per_sec": sum(turns) / timer}
+
+
+def step_latency(games, agent, opponent, seed):
+    """
+    Plays a seeded tournament with every step call of agent timed and returns the
+    percentiles of the step latency in microseconds.
+    """
+
+    latencies = list()
+    step = agent.step
+
+    def timed_step(player, open_card):
+        start = time.perf_counter_ns()
+        card = step(player, open_card)
+        latencies.append(time.perf_counter_ns() - start)
+        return card
+
+    agent.step = timed_step
+    try:
+        uno.tournament(games, agent, opponent, False, seed)
+    finally:
+        del agent.step
+
+    latencies = np.array(latencies) / 1000
+    return {"steps"  : len(latencies),
+            "mean_us": float(latencies.mean()),
+            "p50_us" : float(np.percentile(latencies, 50)),
+            "p90_us" : float(np.percentile(latencies, 90)),
+            "p99_us" : float(np.percentile(latencies, 99)),
+            "max_us" : float(latencies.max())}
+
+
+def model_load(repeats=5):
+    """
+    Saves a Q-model with random values to a temporary directory and returns the median time
+    in seconds to load it as writable copy and as read-only memory map.
+    """
+
+    actions = sar.actions()
+    table = QTable(actions)
+    table.q[:] = np.random.default_rng(0).random(table.q.shape)
+
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "model")
+        table.save(path)
+
+        for name, writable in [("writable_sec", True), ("mmap_sec", False)]:
+            timings = list()
+            for i in range(repeats):
+                start = time.perf_counter()
+                QTable(actions, table.space).load(path, writable)
+                timings.append(time.perf_counter() - start)
+            results[name] = float(np.median(timings))
+
+    return results
+
+
+def ga_generation(generations, pop_size, games, seed):
+    """
+    Runs a seeded genetic search of the strategic agent against the random player and returns
+    the time per generation in seconds.
+    """
+
+    random.seed(seed)
+    start = time.perf_counter()
+    genetic.GeneticSearch(strategic_agent(), generations, pop_size, genetic.TournamentFitness(games),
+                          carryover = pop_size // 2, common_seeds = True)
+    timer = time.perf_counter() - start
+
+    return {"generations"       : generations,
+            "pop_size"          : pop_size,
+            "games"             : games,
+            "seconds"           : timer,
+            "sec_per_generation": timer / generations}
+
+
+# 3. Suite
+# -------------------------------------------------------------------------
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True,
+                                text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {"commit"   : commit,
+            "timestamp": datetime.datetime.now().isoformat(timespec = "seconds"),
+            "python"   : sys.version.split()[0],
+            "numpy"    : np.__version__,
+            "platform" : platform.platform(),
+            "cpus"     : os.cpu_count()}
+
+
+def run(games=2000, seed=0):
+    """
+    Runs all benchmarks with tournaments of the given number of games and returns the results.
+    """
+
+    results = {"environment": environment_info(), "seed": seed}
+
+    results["tournament"] = {
+        "random_vs_random"    : tournament_throughput(games, None, None, seed),
+        "strategic_vs_random" : tournament_throughput(games, strategic_agent(), None, seed),
+        "q_no_learn_vs_random": tournament_throughput(games, q_agent(False), None, seed),
+        "q_learn_vs_random"   : tournament_throughput(games, q_agent(True), None, seed)}
+
+    results["step_latency"] = {
+        "strategic" : step_latency(games // 4, strategic_agent(), None, seed),
+        "q_no_learn": step_latency(games // 4, q_agent(False), None, seed),
+        "q_learn"   : step_latency(games // 4, q_agent(True), None, seed)}
+
+    results["model_load"] = model_load()
+    results["ga_generation"] = ga_generation(2, 10, max(games // 100, 10), seed)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmarks the engine, agents and genetic search.")
+    parser.add_argument("--out", default = "benchmark.json", help = "path of the JSON results")
+    parser.add_argument("--games", type = int, default = 2000, help = "games per tournament")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    results = run(args.games, args.seed)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok = True)
+    with open(args.out, "w") as file:
+        json.dump(results, file, indent = 2)
+
+    print(json.dumps(results, indent = 2))
@@ -5,7 +5,9 @@
 import state_action_reward as sar
 
 # Public libraries
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from time import perf_counter_ns
 import random
 import time
 import sys, os
@@ -35,20 +37,45 @@ def underline(string):
 # 2. Card
 # -------------------------------------------------------------------------
 
+# Cards are encoded as small integers: code = color*16 + value
+COLORS = ["RED","GRE","BLU","YEL","WILD"]
+VALUES = [0,1,2,3,4,5,6,7,8,9,"SKI","REV","PL2","PL4","COL"]
+
+COLOR_CODE = {c: i for i, c in enumerate(COLORS)}
+VALUE_CODE = {v: i for i, v in enumerate(VALUES)}
+WILD_VALUE = VALUE_CODE["PL4"]
+WILD_CODE  = COLOR_CODE["WILD"]*16
+
+# Value codes of the special and wild cards in the order of the state properties
+SPEC_CODES = [VALUE_CODE[v] for v in ["SKI","REV","PL2"]]
+WILD_CODES = [VALUE_CODE[v] for v in ["PL4","COL"]]
+
+
 class Card(object):
     """
-    Card is represented as tuple with properties 'color' and 'value'.
+    Card is represented as tuple with properties 'color' and 'value' and their integer 'code'.
     Card can be evaluated if playable.
+    Cards are not mutated, all cards of the deck are shared instances taken from CARDS.
     """
 
+    __slots__ = ("color", "value", "code")
+
     def __init__(self, c, v):
         self.color = c
         self.value = v
+        self.code  = COLOR_CODE.get(c, 15)*16 + VALUE_CODE.get(v, 15)
+
 
+    def evaluate_card(self, open_code):
+        same = self.code ^ open_code
+        return ((same & 0xF0) == 0) or ((same & 0x0F) == 0) or ((self.code & 0x0F) >= WILD_VALUE)
 
-    def evaluate_card(self, open_c, open_v):
-        if (self.color == open_c) or (self.value == open_v) or (self.value in ["COL","PL4"]):
-            return True
+
+    def recolor(self, c):
+        """
+        Returns the card with the same value and the chosen color, used for played wild cards.
+        """
+        return CARDS[COLOR_CODE[c]*16 + (self.code & 0x0F)]
 
 
     def show_card(self):
@@ -59,58 +86,126 @@ class Card(object):
         return str(self.color) + " " + str(self.value)
 
 
+# One shared card instance per code
+CARDS = [None]*len(COLORS)*16
+for c in COLORS:
+    for v in VALUES:
+        card = Card(c, v)
+        CARDS[card.code] = card
+
+NO_CARD = Card(0,0)
+
+
 # 3. Deck
 # -------------------------------------------------------------------------
 
+def build_codes():
+    colors = ["RED","GRE","BLU","YEL"]
+
+    cards_zero   = [(c,0) for c in colors]
+    cards_normal = [(c,v) for c in colors for v in range (1,10)]*2
+    cards_action = [(c,v) for c in colors for v in ["SKI","REV","PL2"]]*2
+    cards_wild   = [("WILD",v) for v in ["COL","PL4"]]*4
+
+    cards_all = cards_normal + cards_action + cards_zero + cards_wild
+    return bytes(COLOR_CODE[c]*16 + VALUE_CODE[v] for c, v in cards_all)
+
+DECK_CODES = build_codes()
+
+
 class Deck(object):
     """
-    Deck consists of list of cards. Is initialized with standard list of cards.
-    Deck can be shuffled, drawn from.
+    Deck consists of two preallocated arrays of card codes, the draw pile and the discard pile,
+    each filled up to its count. Cards are drawn from the end of the draw pile. When it runs
+    out, the discard pile except the open card becomes the draw pile and is shuffled in place,
+    the open card stays as the only card of the discard pile. A deck can be reused for any
+    number of games, reset refills and shuffles it without allocating.
     """
 
     def __init__(self):
-        self.cards = []
-        self.cards_disc = []
+        self.cards      = bytearray(len(DECK_CODES))
+        self.cards_disc = bytearray(len(DECK_CODES))
+        self.reset()
+
+
+    def reset(self):
         self.build()
         self.shuffle()
 
 
     def build(self):
-        colors = ["RED","GRE","BLU","YEL"]
+        self.cards[:] = DECK_CODES
+        self.n_cards  = len(DECK_CODES)
+        self.n_disc   = 0
+        self.i_open   = -1
+
 
-        cards_zero   = [Card(c,0) for c in colors]
-        cards_normal = [Card(c,v) for c in colors for v in range (1,10)]*2
-        cards_action = [Card(c,v) for c in colors for v in ["SKI","REV","PL2"]]*2
-        cards_wild   = [Card("WILD",v) for v in ["COL","PL4"]]*4
+    def discard(self, card):
+        """
+        Puts a card on the discard pile. Wild cards return to the pile as WILD, whatever
+        color was chosen when they were played.
+        """
 
-        cards_all = cards_normal + cards_action + cards_zero + cards_wild
-        for card in cards_all: self.cards.append(card)
+        code = card.code
+        if (code & 0x0F) >= WILD_VALUE: code = WILD_CODE | (code & 0x0F)
+        self.cards_disc[self.n_disc] = code
+        self.n_disc += 1
 
 
-    def discard(self, card):
-        self.cards_disc.append(card)
+    def play(self, card):
+        """
+        Puts a played card on the discard pile as the open card. Counter cards are discarded
+        without becoming the open card, so it is not always the top of the pile.
+        """
+
+        self.i_open = self.n_disc
+        self.discard(card)
 
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        """
+        Shuffles the draw pile in place.
+        """
+
+        if self.n_cards == len(self.cards):
+            random.shuffle(self.cards)
+        else:
+            random.shuffle(memoryview(self.cards)[:self.n_cards])
 
 
     def draw_from_deck(self):
-        if len(self.cards) == 0:
-            self.cards = self.cards_disc
-            self.cards_disc = []
+        if self.n_cards == 0:
+            cards, n, i_open = self.cards_disc, self.n_disc, self.i_open
+
+            # The open card is moved to the end of the discard pile and kept out of the shuffle
+            if i_open >= 0:
+                n -= 1
+                cards[i_open], cards[n] = cards[n], cards[i_open]
+
+            self.cards, self.cards_disc = cards, self.cards
+            self.n_cards, self.n_disc = n, 0
+
+            if i_open >= 0:
+                self.cards_disc[0] = cards[n]
+                self.n_disc, self.i_open = 1, 0
+
+            self.shuffle()
+
+        if self.n_cards == 0:
+            raise IndexError("draw from an empty deck")
 
-        return self.cards.pop()
+        self.n_cards -= 1
+        return CARDS[self.cards[self.n_cards]]
 
 
     def show_deck(self):
-        for c in self.cards:
-            c.show_card()
+        for c in self.cards[:self.n_cards]:
+            CARDS[c].show_card()
 
 
     def show_discarded(self):
-        for c in self.cards_disc:
-            c.show_card()
+        for c in self.cards_disc[:self.n_disc]:
+            CARDS[c].show_card()
 
 
 # 4. Player
@@ -127,30 +222,61 @@ class Player(object):
     def __init__(self, agent):
         self.name      = "Random"
         self.agent     = agent
+        self.opponent  = None
 
         if agent is not None:
             self.name = agent.name
             agent.reset()
 
-        self.hand      = list()
-        self.hand_play = list()
-        self.card_play = 0
+        self.hand       = list()
+        self.cards_play = list()
+        self.card_play  = 0
+        self.card_open  = NO_CARD
+
+        # Hand index: cards per code, per color, per value and normal cards per color,
+        # maintained in O(1) whenever a card is added to or removed from the hand
+        self.code_count  = [0]*len(CARDS)
+        self.color_count = [0]*len(COLORS)
+        self.value_count = [0]*len(VALUES)
+        self.norm_count  = [0]*4
+
+        # hand_play is cached for the open card and the version of the hand
+        self.hand_version = 0
+        self.play_key     = None
+
+        self.comment      = True
 
         self.state        = dict()
+        self.state_code   = 0
         self.actions      = dict()
         self.action       = 0
 
 
     def evaluate_hand(self, card_open):
         """
-        Loops through each card in players' hand. Evaluation depends on card open.
+        Evaluates players' hand against card_open, the playable cards are then found in hand_play.
         Required parameters: card_open as card
         """
 
-        self.hand_play.clear()
-        for card in self.hand:
-            if card.evaluate_card(card_open.color, card_open.value) == True:
-                self.hand_play.append(card)
+        self.card_open = card_open
+
+
+    @property
+    def hand_play(self):
+        """
+        The playable cards in players' hand for the evaluated open card, in the order of the hand.
+        The list is only built when it is read and then kept until the hand or the open card
+        change, so repeated evaluations within a turn are free.
+        """
+
+        key = (self.card_open.code, self.hand_version)
+        if key != self.play_key:
+            self.play_key = key
+
+            open_code = key[0]
+            self.cards_play[:] = [card for card in self.hand if card.evaluate_card(open_code)]
+
+        return self.cards_play
 
 
     def draw(self, deck, card_open):
@@ -162,14 +288,61 @@ class Player(object):
         """
 
         card = deck.draw_from_deck()
-        self.hand.append(card)
+        self.add_card(card)
         self.evaluate_hand(card_open)
-        print (f'{self.name} draws {card.print_card()}')
+        if self.comment: print (f'{self.name} draws {card.print_card()}')
+
+
+    def add_card(self, card):
+        """
+        Adds a card to players' hand and to the hand index.
+        """
+
+        self.hand.append(card)
+        code = card.code
+        self.hand_version += 1
+        self.code_count[code] += 1
+        self.color_count[code >> 4] += 1
+        self.value_count[code & 0x0F] += 1
+        if (code & 0x0F) < 10: self.norm_count[code >> 4] += 1
+
+
+    def remove_card(self, card):
+        """
+        Removes a card from players' hand and from the hand index.
+        """
+
+        self.hand.remove(card)
+        code = card.code
+        self.hand_version += 1
+        self.code_count[code] -= 1
+        self.color_count[code >> 4] -= 1
+        self.value_count[code & 0x0F] -= 1
+        if (code & 0x0F) < 10: self.norm_count[code >> 4] -= 1
+
+
+    def playable(self, card_open):
+        """
+        Reads from the hand index whether normal cards of each color, special cards of each value
+        and wild cards of each value are playable on card_open, as lists of 0/1 in the order
+        of the state properties.
+        """
+
+        open_c, open_v = card_open.code >> 4, card_open.code & 0x0F
+        code_count = self.code_count
+
+        norm_play = [1 if ((c == open_c) and self.norm_count[c]) or ((open_v < 10) and code_count[c*16 + open_v]) else 0
+                     for c in range(4)]
+        spec_play = [1 if (open_c < 4 and code_count[open_c*16 + v]) or ((open_v == v) and self.value_count[v]) else 0
+                     for v in SPEC_CODES]
+        wild_play = [1 if self.value_count[v] else 0 for v in WILD_CODES]
+
+        return norm_play, spec_play, wild_play
 
 
     def identify_state(self, card_open):
         """
-        The state of the player is identified by looping through players' hand for each property of the state.
+        The state of the player is identified by reading each property of the state from the hand index.
         """
 
         norm_cards = {"RED":2,"GRE":2,"BLU":2,"YEL":2}
@@ -182,25 +355,48 @@ class Player(object):
         self.state["OPEN"] = card_open.color
         if self.state["OPEN"] not in ["RED","GRE","BLU","YEL"]: random.choice(["RED","GRE","BLU","YEL"])
 
+        norm_play, spec_play, wild_play = self.playable(card_open)
+
         # (1) State properties: normal hand cards
-        for key, val in zip(norm_cards.keys(), norm_cards.values()):
-                self.state[key] = min([1 if (card.color == key) and (card.value in range(0,10)) else 0 for card in self.hand].count(1),val)
+        for key, val in norm_cards.items():
+                self.state[key] = min(self.norm_count[COLOR_CODE[key]], val)
 
         # (2) State properties: special hand cards
-        for key, val in zip(spec_cards.keys(), spec_cards.values()):
-                self.state[key] = min([1 if (card.value == key) else 0 for card in self.hand].count(1),val)
+        for key, val in spec_cards.items():
+                self.state[key] = min(self.value_count[VALUE_CODE[key]], val)
 
         # (3) State properties: wild hand cards
-        for key, val in zip(wild_cards.keys(), wild_cards.values()):
-                self.state[key] = min([1 if (card.value == key) else 0 for card in self.hand].count(1),val)
+        for key, val in wild_cards.items():
+                self.state[key] = min(self.value_count[VALUE_CODE[key]], val)
 
         # (4) State properties: normal playable cards
-        for key, val in zip(norm_cards.keys(), norm_cards.values()):
-                self.state[key+"#"] = min([1 if (card.color == key) and (card.value in range(0,10)) else 0 for card in self.hand_play].count(1),val-1)
+        for key, play in zip(norm_cards.keys(), norm_play):
+                self.state[key+"#"] = play
 
         # (5) State properties: special playable cards
-        for key, val in zip(spec_cards.keys(), spec_cards.values()):
-                self.state[key+"#"] = min([1 if card.value == key else 0 for card in self.hand_play].count(1),val)
+        for key, play in zip(spec_cards.keys(), spec_play):
+                self.state[key+"#"] = play
+
+
+    def identify_state_code(self, card_open):
+        """
+        The state of the player is identified as integer code read from the hand index.
+        The code orders like the state tuples built by identify_state (see state_encoder).
+        """
+
+        norm_play, spec_play, wild_play = self.playable(card_open)
+        value_count = self.value_count
+
+        # Digits in the order of the state tuple, each clamped to its radix
+        code = card_open.code >> 4
+        for n in self.norm_count: code = code*3 + (n if n < 2 else 2)
+        for v in SPEC_CODES: code = code*2 + (1 if value_count[v] else 0)
+        for v in WILD_CODES: code = code*2 + (1 if value_count[v] else 0)
+        for n in norm_play: code = code*2 + n
+        for n in spec_play: code = code*2 + n
+
+        self.state_code = code
+        return self.state_code
 
 
     def identify_action(self):
@@ -213,17 +409,19 @@ class Player(object):
         wild_cards = {"PL4":1,"COL":1}
 
 
+        norm_play, spec_play, wild_play = self.playable(self.card_open)
+
         # (1) Action properties: normal playable cards
-        for key in norm_cards.keys():
-            self.actions[key] = min([1 if (card.color == key) and (card.value in range(0,10)) else 0 for card in self.hand_play].count(1),1)
+        for key, play in zip(norm_cards.keys(), norm_play):
+            self.actions[key] = play
 
         # (2) Action properties: special playable cards
-        for key in spec_cards.keys():
-            self.actions[key] = min([1 if card.value == key else 0 for card in self.hand_play].count(1),1)
+        for key, play in zip(spec_cards.keys(), spec_play):
+            self.actions[key] = play
 
         # (3) Action properties: wild playable cards
-        for key in wild_cards.keys():
-            self.actions[key] = min([1 if card.value == key else 0 for card in self.hand_play].count(1),1)
+        for key, play in zip(wild_cards.keys(), wild_play):
+            self.actions[key] = play
 
 
     def play_agent(self, deck, card_open):
@@ -243,16 +441,16 @@ class Player(object):
 
         # Selected card is played
         try:
-            self.hand.remove(self.card_play)
+            self.remove_card(self.card_play)
         except ValueError:
             raise Exception(self.card_play.print_card())
 
-        self.hand_play.pop()
-        deck.discard(self.card_play)
-        print (f'\n{self.name} plays {self.card_play.print_card()}')
+        if self.comment: print (f'\n{self.name} plays {self.card_play.print_card()}')
 
         if self.card_play.color == "WILD":
-            self.card_play.color = self.choose_color()
+            self.card_play = self.card_play.recolor(self.choose_color())
+
+        deck.play(self.card_play)
 
 
     def play_rand(self, deck, card_open):
@@ -266,13 +464,13 @@ class Player(object):
         """
 
         self.card_play = random.choice(self.hand_play)
-        self.hand.remove(self.card_play)
-        self.hand_play.pop()
-        deck.discard(self.card_play)
-        print (f'\n{self.name} plays {self.card_play.print_card()}')
+        self.remove_card(self.card_play)
+        if self.comment: print (f'\n{self.name} plays {self.card_play.print_card()}')
 
         if self.card_play.color == "WILD":
-            self.card_play.color = self.choose_color()
+            self.card_play = self.card_play.recolor(self.choose_color())
+
+        deck.play(self.card_play)
 
 
     def play_counter(self, deck, card_open, plus_card):
@@ -287,10 +485,10 @@ class Player(object):
         for card in self.hand:
             if card == plus_card:
                 self.card_play = card
-                self.hand.remove(card)
+                self.remove_card(card)
                 deck.discard(card)
                 self.evaluate_hand(card_open)
-                print (f'{self.name} counters with {card.print_card()}')
+                if self.comment: print (f'{self.name} counters with {card.print_card()}')
                 break
 
 
@@ -300,13 +498,18 @@ class Player(object):
         Color is determined by the majority color in the active players' hand.
         """
 
-        colors = [card.color for card in self.hand if card.color in ["RED","GRE","BLU","YEL"]]
-        if len(colors)>0:
-            max_color = max(colors, key = colors.count)
-        else:
+        counts = self.color_count[:4]
+        most   = max(counts)
+
+        if most == 0:
             max_color = random.choice(["RED","GRE","BLU","YEL"])
+        elif counts.count(most) == 1:
+            max_color = COLORS[counts.index(most)]
+        else:
+            # Ties go to the color that comes first in the hand
+            max_color = next(card.color for card in self.hand if (card.code >> 4) < 4 and counts[card.code >> 4] == most)
 
-        print (f'{self.name} chooses {max_color}')
+        if self.comment: print (f'{self.name} chooses {max_color}')
         return max_color
 
 
@@ -334,11 +537,12 @@ class Turn(object):
         - Counter action by oposite player in case of PL2 or PL4
     """
 
-    def __init__(self, deck, player_1, player_2):
+    def __init__(self, deck, player_1, player_2, comment=True):
         """
         Turn is initialized with standard deck, players and an open card
         """
 
+        self.comment = comment
         self.deck = deck
         self.player_1 = player_1
         self.player_2 = player_2
@@ -348,10 +552,10 @@ class Turn(object):
 
     def start_up(self):
         while self.card_open.value not in range(0,10):
-            print (f'Inital open card {self.card_open.print_card()} has to be normal')
+            if self.comment: print (f'Inital open card {self.card_open.print_card()} has to be normal')
             self.card_open = self.deck.draw_from_deck()
 
-        print (f'Inital open card is {self.card_open.print_card()}\n')
+        if self.comment: print (f'Inital open card is {self.card_open.print_card()}\n')
 
         for i in range (7):
             self.player_1.draw(self.deck, self.card_open)
@@ -380,7 +584,7 @@ class Turn(object):
 
         # (2) When player has to draw a card
         else:
-            print (f'{player.name} has no playable card')
+            if self.comment: print (f'{player.name} has no playable card')
             player.draw(self.deck, self.card_open)
 
             # (2a) When player draw a card that is finally playable
@@ -396,7 +600,7 @@ class Turn(object):
 
             # (2b) When player has not drawn a playable card, do nothing
             else:
-                player.card_play = Card(0,0)
+                player.card_play = NO_CARD
 
         if check_win(player) == True: return
         if check_win(opponent) == True: return
@@ -416,10 +620,11 @@ class Turn(object):
 
 
         hit, self.count = True, 1
+        plus_value = VALUE_CODE["PL"+str(penalty)]
 
         while hit == True:
             hit = False
-            for card in opponent.hand:
+            for card in (opponent.hand if opponent.value_count[plus_value] else ()):
                 if card.value == "PL"+str(penalty):
                     opponent.play_counter(self.deck, self.card_open, card)
                     hit = True
@@ -430,7 +635,7 @@ class Turn(object):
 
             if hit == True:
                 hit = False
-                for card in player.hand:
+                for card in (player.hand if player.value_count[plus_value] else ()):
                     if card.value == "PL"+str(penalty):
                         player.play_counter(self.deck, self.card_open, card)
                         hit = True
@@ -441,11 +646,11 @@ class Turn(object):
 
 
         if self.count%2 == 0:
-            print (f'\n{player.name} has to draw {self.count*penalty} cards')
+            if self.comment: print (f'\n{player.name} has to draw {self.count*penalty} cards')
             for i in range (self.count*penalty): player.draw(self.deck, self.card_open)
 
         else:
-            print (f'\n{opponent.name} has to draw {self.count*penalty} cards')
+            if self.comment: print (f'\n{opponent.name} has to draw {self.count*penalty} cards')
             for i in range (self.count*penalty): opponent.draw(self.deck, self.card_open)
 
 
@@ -456,15 +661,25 @@ class Game(object):
     """
     A game reflects an iteration of turns, until one player fulfills the winning condition of 0 hand cards.
     It initialized with two players and a turn object.
+    Without comment the game runs headless: narration is skipped entirely instead of being printed
+    to os.devnull, which does not change the course of the game.
+    A deck passed in is reset and reused, otherwise the game creates its own.
     """
 
-    def __init__(self, player_1, player_2, comment):
+    def __init__(self, player_1, player_2, comment, deck=None):
 
-        if comment == False: block_print()
+        if deck is None:
+            deck = Deck()
+        else:
+            deck.reset()
 
         self.player_1 = player_1
         self.player_2 = player_2
-        self.turn = Turn(Deck(), self.player_1, self.player_2)
+        self.player_1.comment = comment
+        self.player_2.comment = comment
+        self.player_1.opponent = self.player_2
+        self.player_2.opponent = self.player_1
+        self.turn = Turn(deck, self.player_1, self.player_2, comment)
 
         self.turn_no = 0
         self.winner = 0
@@ -473,60 +688,176 @@ class Game(object):
         while self.winner == 0:
             self.turn_no += 1
             card_open = self.turn.card_open
-            bold (f'\n---------- TURN {self.turn_no} ----------')
-            print (f'\nCurrent open card: {self.turn.card_open.print_card()}')
+
+            if comment:
+                bold (f'\n---------- TURN {self.turn_no} ----------')
+                print (f'\nCurrent open card: {self.turn.card_open.print_card()}')
 
             if self.turn_no % 2 == 0:
                 player_act, player_pas = self.player_1, self.player_2
             else:
                 player_act, player_pas = self.player_2, self.player_1
 
-            player_act.show_hand()
-            player_act.show_hand_play(card_open)
+            if comment:
+                player_act.show_hand()
+                player_act.show_hand_play(card_open)
+
             self.turn.action(player_act, player_pas)
 
             if check_win(player_act) == True:
                 self.winner = player_act.name
-                print (f'{player_act.name} has won!')
+                if comment: print (f'{player_act.name} has won!')
                 break
 
             if check_win(player_pas) == True:
                 self.winner = player_pas.name
-                print (f'{player_pas.name} has won!')
+                if comment: print (f'{player_pas.name} has won!')
                 break
 
             if player_act.card_play.value in ["REV", "SKIP"]:
-                print (f'{player_act.name} has another turn')
+                if comment: print (f'{player_act.name} has another turn')
                 self.turn_no = self.turn_no-1
 
             if (self.turn.count > 0) and (self.turn.count %2 == 0):
-                print (f'Again it is {player_act.name}s turn')
+                if comment: print (f'Again it is {player_act.name}s turn')
                 self.turn_no = self.turn_no-1
 
-        if comment == False: enable_print()
-
 
 # 7. Tournament
 # -------------------------------------------------------------------------
 
-def tournament(iterations, agent1, agent2, comment):
+def game_seed(seed, i):
+    """
+    Seed of the i-th game of a tournament, derived from the master seed of the tournament.
+    """
+
+    return (seed << 32) + i
+
+
+def play_game(i, agent1, agent2, comment, seed=None, mirror=False, deck=None):
+    """
+    Plays the i-th game of a tournament. The starting seat alternates with i and, given a
+    master seed, the game is seeded independent of all games played before. Mirrored games
+    come in pairs that share the deal, with the agents in swapped seats. Games of a tournament
+    reuse its deck.
+    """
+
+    if seed is not None:
+        random.seed(game_seed(seed, i//2 if mirror else i))
+
+    if i%2 == 1:
+        return Game(Player(agent1), Player(agent2), comment, deck)
+    else:
+        return Game(Player(agent2), Player(agent1), comment, deck)
+
+
+def tournament(iterations, agent1, agent2, comment, seed=None, mirror=False, profile=False):
     """
     A function that iterates various Games and outputs summary statistics over all executed simulations.
+    Optional parameters:
+        - seed as int, seeds every game from this master seed (see game_seed)
+        - mirror as bool, with a seed each deal is played twice with swapped seats
+        - profile as bool, times the phases of the games (see Profiler) and returns the
+          profile summary as fourth element
+    A seeded tournament restores the state of the random module afterwards, so that it does
+    not interfere with the random numbers of the caller.
     """
 
     timer_start = time.time()
+    random_state = random.getstate() if seed is not None else None
 
     winners, turns = list(), list()
+    deck = Deck()
 
-    for i in range(iterations):
+    profiler = Profiler() if profile else None
+    if profiler is not None: profiler.install(agent1, agent2)
 
-        if i%2 == 1:
-            game = Game(Player(agent1), Player(agent2), comment)
-        else:
-            game = Game(Player(agent2), Player(agent1), comment)
+    try:
+        for i in range(iterations):
 
-        winners.append(game.winner)
-        turns.append(game.turn_no)
+            game = play_game(i, agent1, agent2, comment, seed, mirror, deck)
+
+            winners.append(game.winner)
+            turns.append(game.turn_no)
+
+    finally:
+        if profiler is not None: profiler.uninstall()
+
+    if random_state is not None:
+        random.setstate(random_state)
+
+    # Timer
+    timer_end = time.time()
+    timer = timer_end - timer_start
+
+    if profiler is not None:
+        return winners, turns, timer, profiler.summary()
+
+    return winners, turns, timer
+
+
+def stream_tournament(iterations, agent1, agent2, seed=None, mirror=False, start=0):
+    """
+    Plays a tournament like tournament(iterations, agent1, agent2, False, seed, mirror), but
+    instead of collecting lists it yields one record per game as soon as it is played, from
+    game start on, so that a chunk of a seeded tournament can be played on its own:
+        - winner as int, 0 if agent1 won and 1 if agent2 won, also for agents of the same name
+        - turns as int
+        - seed as int, the seed of the game (see game_seed), or its index without master seed
+    The state of the random module is restored when the generator is exhausted or closed.
+    """
+
+    random_state = random.getstate() if seed is not None else None
+    deck = Deck()
+
+    try:
+        for i in range(start, iterations):
+
+            game = play_game(i, agent1, agent2, False, seed, mirror, deck)
+
+            # player_1 is agent1 in odd games, see play_game
+            seat = 0 if check_win(game.player_1) else 1
+            winner = seat if i%2 == 1 else 1 - seat
+
+            yield winner, game.turn_no, i if seed is None else game_seed(seed, i//2 if mirror else i)
+
+    finally:
+        if random_state is not None:
+            random.setstate(random_state)
+
+
+def parallel_tournament(iterations, agent1, agent2, seed=0, workers=None, chunk_size=1000, mirror=False):
+    """
+    Plays a tournament on a pool of worker processes. Games are handed out in chunks of
+    chunk_size and each game is seeded from the master seed, so winners and turns are merged
+    in game order and equal tournament(iterations, agent1, agent2, False, seed) for any
+    number of workers.
+
+    Every worker plays with its own copy of the agents, agents that learn are therefore refused.
+    Required parameters:
+        - iterations as int
+        - agent1, agent2 as agents or None
+    Optional parameters:
+        - seed as int
+        - workers as int, defaults to the number of cores
+        - chunk_size as int
+        - mirror as bool, each deal is played twice with swapped seats
+    """
+
+    refuse_learning([agent1, agent2], "parallel tournaments")
+
+    timer_start = time.time()
+
+    winners, turns = list(), list()
+    chunks = [(i, min(i + chunk_size, iterations), seed, mirror) for i in range(0, iterations, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers = workers,
+                             initializer = init_worker,
+                             initargs    = (agent1, agent2)) as executor:
+
+        for chunk_winners, chunk_turns in executor.map(play_chunk, chunks):
+            winners.extend(chunk_winners)
+            turns.extend(chunk_turns)
 
     # Timer
     timer_end = time.time()
@@ -535,9 +866,169 @@ def tournament(iterations, agent1, agent2, comment):
     return winners, turns, timer
 
 
+# Agents of the tournament played by a worker process
+worker_agents = (None, None)
+
+def init_worker(agent1, agent2):
+    global worker_agents
+    worker_agents = (agent1, agent2)
+
+
+def play_chunk(chunk):
+    start, stop, seed, mirror = chunk
+    agent1, agent2 = worker_agents
+
+    return play_games(start, stop, agent1, agent2, seed, mirror)
+
+
+def play_games(start, stop, agent1, agent2, seed=None, mirror=False):
+    """
+    Plays games start to stop of a tournament without comments on one reused deck and returns
+    winners and turns, e.g. the chunk of a tournament a worker process plays.
+    """
+
+    winners, turns = list(), list()
+    deck = Deck()
+    for i in range(start, stop):
+        game = play_game(i, agent1, agent2, False, seed, mirror, deck)
+        winners.append(game.winner)
+        turns.append(game.turn_no)
+
+    return winners, turns
+
+
+def refuse_learning(agents, context):
+    """
+    Raises a ValueError if one of agents learns, context names what requires agents that
+    do not learn, e.g. "parallel tournaments".
+    """
+
+    for agent in agents:
+        if getattr(agent, "learn", False):
+            raise ValueError(f'{agent.name} is learning, {context} require learn = False')
+
+
 # 8. Winning Condition
 # -------------------------------------------------------------------------
 
 def check_win(player):
     if len(player.hand) == 0:
         return True
+
+
+# 9. Profiling
+# -------------------------------------------------------------------------
+
+class Profiler(object):
+    """
+    Collects the cumulative time in nanoseconds and the number of calls of the phases of a game:
+    the game as a whole, Turn.action and Turn.action_plus, the evaluation of the hand (reading
+    Player.hand_play, which scans the hand when it changed), the Player methods draw,
+    identify_state and identify_state_code, printing, and step and update of the agents.
+    install() replaces these functions by timed wrappers and uninstall() restores them, so
+    nothing is timed, and nothing costs, while the profiler is not installed. Times are
+    inclusive: the time of a phase contains the time of the phases it calls, e.g. step
+    contains identify_state_code and update.
+    """
+
+    # Phases of the classes of this module, as (class, method, phase)
+    methods = [("Game",   "__init__",            "game"),
+               ("Turn",   "action",              "action"),
+               ("Turn",   "action_plus",         "action_plus"),
+               ("Player", "hand_play",           "evaluate_hand"),
+               ("Player", "draw",                "draw"),
+               ("Player", "identify_state",      "identify_state"),
+               ("Player", "identify_state_code", "identify_state_code")]
+
+    def __init__(self):
+        self.time  = dict()
+        self.calls = dict()
+        self.patches = list()
+
+
+    def timed(self, phase, function):
+        """
+        Returns function wrapped to add its time and calls to phase.
+        """
+
+        self.time.setdefault(phase, 0)
+        self.calls.setdefault(phase, 0)
+        totals, calls = self.time, self.calls
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[phase] += perf_counter_ns() - start
+                calls[phase] += 1
+
+        return wrapper
+
+
+    def patch(self, owner, name, phase):
+        """
+        Replaces the attribute name of owner, a class or an agent, by its timed wrapper,
+        of a property the getter.
+        """
+
+        attribute = vars(owner).get(name, None)
+        self.patches.append((owner, name, attribute))
+
+        if isinstance(attribute, property):
+            setattr(owner, name, property(self.timed(phase, attribute.fget)))
+        else:
+            setattr(owner, name, self.timed(phase, getattr(owner, name)))
+
+
+    def install(self, *agents):
+        """
+        Installs the timed wrappers for the games of this process and the given agents
+        (None for random players), whose step and update are timed per agent name.
+        """
+
+        module = globals()
+        for cls, name, phase in self.methods:
+            self.patch(module[cls], name, phase)
+
+        # Narration is printed through the module's print
+        self.patches.append((module, "print", None))
+        module["print"] = self.timed("print", print)
+
+        for agent in dict.fromkeys(agent for agent in agents if agent is not None):
+            self.patch(agent, "step", f'{agent.name}.step')
+            if callable(getattr(agent, "update", None)):
+                self.patch(agent, "update", f'{agent.name}.update')
+
+
+    def uninstall(self):
+        """
+        Restores the original functions.
+        """
+
+        for owner, name, original in reversed(self.patches):
+            if owner is globals():
+                del owner[name]
+            elif original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+        self.patches = list()
+
+
+    def summary(self):
+        """
+        Returns a dict per phase of its calls, total time in milliseconds, mean time per call in
+        microseconds and share of the game time, sorted by total time.
+        """
+
+        total = self.time.get("game", 0) or sum(self.time.values()) or 1
+        summary = dict()
+        for phase in sorted(self.time, key = self.time.get, reverse = True):
+            summary[phase] = {"calls"   : self.calls[phase],
+                              "total_ms": self.time[phase] / 1e6,
+                              "mean_us" : self.time[phase] / 1e3 / max(self.calls[phase], 1),
+                              "share"   : self.time[phase] / total}
+
+        return summary
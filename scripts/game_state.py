@@ -0,0 +1,290 @@
+"""
+A compact, copyable game state and an engine to step it, for lookahead and rollouts on top
+of environment.py. The state is a few bytearrays of card codes (see environment.Card) and
+some integers, so fork() copies a couple of hundred bytes instead of an object graph.
+
+step(state, action) advances a state by one action with the rules of environment.Game: a player
+without playable card draws one and may play it if it is playable, +2 and +4 cards are countered
+as long as the other side holds one, a REV card or an even counter chain gives another turn.
+Randomness comes from the random module in the same order as in Game, so a state dealt and
+played with the same seed as a Game with random players replays that game.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+
+# Public libraries
+import random
+
+
+# 2. Constants
+# -------------------------------------------------------------------------
+
+REV  = uno.VALUE_CODE["REV"]
+PL2  = uno.VALUE_CODE["PL2"]
+PL4  = uno.VALUE_CODE["PL4"]
+WILD = uno.COLOR_CODE["WILD"]
+
+
+# 3. Game State
+# -------------------------------------------------------------------------
+
+class GameState(object):
+    """
+    State of a game between seat 0 (player_1 of Game) and seat 1 (player_2):
+        - hands as two bytearrays of card codes in the order of the hands
+        - deck as bytearray, the draw pile, drawn from the end
+        - disc as bytearray, the discard pile
+        - open as int, code of the open card, wild cards with their chosen color
+        - active as int, the seat to play
+        - turn_no as int, counted like Game.turn_no, where extra turns do not count
+        - drawn as bool, the active seat drew a playable card and has to play it
+        - winner as int, the winning seat or -1
+        - top as int, index of the open card in disc or -1, as it is kept out of reshuffles
+    """
+
+    __slots__ = ("hands", "deck", "disc", "open", "active", "turn_no", "drawn", "winner", "top")
+
+    def __init__(self, hands, deck, disc, open, active, turn_no=0, drawn=False, winner=-1, top=-1):
+        self.hands   = hands
+        self.deck    = deck
+        self.disc    = disc
+        self.open    = open
+        self.active  = active
+        self.turn_no = turn_no
+        self.drawn   = drawn
+        self.winner  = winner
+        self.top     = top
+
+
+    def fork(self):
+        """
+        Returns an independent copy of the state.
+        """
+
+        return GameState([bytearray(self.hands[0]), bytearray(self.hands[1])],
+                         bytearray(self.deck), bytearray(self.disc),
+                         self.open, self.active, self.turn_no, self.drawn, self.winner, self.top)
+
+
+def deal():
+    """
+    Returns the state of a new game, dealt like Turn.start_up: the first normal card turned up
+    is the open card, cards turned up before it leave the game, then both seats get 7 cards,
+    seat 0 first. Seat 1 plays first, as in Game.
+    """
+
+    deck = bytearray(uno.DECK_CODES)
+    random.shuffle(deck)
+
+    open = deck.pop()
+    while (open & 0x0F) >= 10:
+        open = deck.pop()
+
+    state = GameState([bytearray(), bytearray()], deck, bytearray(), open, 1)
+    for i in range(7):
+        draw(state, 0)
+        draw(state, 1)
+
+    return state
+
+
+def capture(deck, player_1, player_2, card_open, active, turn_no=0):
+    """
+    Returns the state of a running game of environment.py.
+    Required parameters:
+        - deck as Deck
+        - player_1, player_2 as Player, seats 0 and 1
+        - card_open as card
+        - active as int, the seat to play
+    Optional parameters: turn_no as int
+    """
+
+    hands = [bytearray(card.code for card in player.hand) for player in [player_1, player_2]]
+    return GameState(hands, bytearray(deck.cards[:deck.n_cards]), bytearray(deck.cards_disc[:deck.n_disc]),
+                     card_open.code, active, turn_no, top = deck.i_open)
+
+
+# 4. Engine
+# -------------------------------------------------------------------------
+
+def playable(state, seat=None):
+    """
+    Returns the codes of the playable cards of seat (default: the active seat) in the order of
+    the hand, equal cards as often as they are held, like Player.hand_play.
+    """
+
+    open = state.open
+    hand = state.hands[state.active if seat is None else seat]
+    return [code for code in hand if uno.CARDS[code].evaluate_card(open)]
+
+
+def draw(state, seat):
+    """
+    Draws a card to the hand of seat. An empty draw pile is replaced by the discard pile except
+    the open card, which is shuffled, like Deck.draw_from_deck. With both empty no card is drawn.
+    Returns the code drawn or None.
+    """
+
+    if not state.deck:
+        cards, top = state.disc, state.top
+        state.disc = bytearray()
+
+        if top >= 0:
+            cards[top], cards[-1] = cards[-1], cards[top]
+            state.disc.append(cards.pop())
+            state.top = 0
+
+        state.deck = cards
+        random.shuffle(state.deck)
+
+        if not state.deck:
+            return None
+
+    code = state.deck.pop()
+    state.hands[seat].append(code)
+    return code
+
+
+def choose_color(hand):
+    """
+    Majority color of the colored cards in hand, ties go to the color that comes first in the
+    hand, as in Player.choose_color.
+    """
+
+    counts = [0, 0, 0, 0]
+    for code in hand:
+        if (code >> 4) < 4: counts[code >> 4] += 1
+
+    most = max(counts)
+    if most == 0:
+        return uno.COLOR_CODE[random.choice(["RED","GRE","BLU","YEL"])]
+
+    if counts.count(most) == 1:
+        return counts.index(most)
+
+    return next(code >> 4 for code in hand if (code >> 4) < 4 and counts[code >> 4] == most)
+
+
+def play(state, seat, code):
+    """
+    Moves the card code from the hand of seat to the discard pile and makes it the open card,
+    wild cards with the color chosen for seat.
+    """
+
+    hand = state.hands[seat]
+    hand.remove(code)
+    value = code & 0x0F
+    state.top = len(state.disc)
+
+    if value >= PL4:
+        state.disc.append(WILD*16 + value)
+        state.open = choose_color(hand)*16 + value
+    else:
+        state.disc.append(code)
+        state.open = code
+
+
+def counter(state, seat, value):
+    """
+    Seat counters with its first card of value, if any. Like Player.play_counter, the counter
+    card is discarded but does not change the open card. Returns True if seat countered.
+    """
+
+    hand = state.hands[seat]
+    for code in hand:
+        if (code & 0x0F) == value:
+            hand.remove(code)
+            state.disc.append(code)
+            return True
+
+    return False
+
+
+def step(state, action=None):
+    """
+    Plays the action of the active seat in place and returns the state. The action is the code
+    of a playable card, or None if the seat has none: then a card is drawn and, if it is
+    playable, the seat acts again with drawn set, to play it or to pass with None.
+    Fork the state first to keep it.
+    Required parameters: state as GameState
+    Optional parameters: action as int (card code)
+    """
+
+    seat = state.active
+    opp  = 1 - seat
+    hand = state.hands[seat]
+
+    # (1) Draw a card without playable card, the turn ends unless it is playable
+    if not state.drawn:
+        state.turn_no += 1
+
+    if action is None:
+        if state.drawn:
+            state.drawn = False
+        else:
+            code = draw(state, seat)
+            state.drawn = (code is not None) and uno.CARDS[code].evaluate_card(state.open)
+
+        if not state.drawn: state.active = opp
+        return state
+
+    # (2) Play the chosen card
+    state.drawn = False
+    play(state, seat, action)
+
+    if not hand:
+        state.winner = seat
+        return state
+
+    # (3) Counter a plus card
+    count, value = 0, action & 0x0F
+    if value in (PL2, PL4):
+        count = 1
+        while counter(state, opp, value):
+            count += 1
+            if not state.hands[opp]:
+                state.winner = opp
+                return state
+
+            if not counter(state, seat, value): break
+            count += 1
+            if not hand:
+                state.winner = seat
+                return state
+
+        loser = seat if count%2 == 0 else opp
+        for i in range(count * (2 if value == PL2 else 4)): draw(state, loser)
+
+    # (4) Another turn after REV or an even counter chain
+    if (value == REV) or (count > 0 and count%2 == 0):
+        state.turn_no -= 1
+    else:
+        state.active = opp
+
+    return state
+
+
+def random_policy(state):
+    """
+    Action of the random player: a random playable card, like Player.play_rand.
+    """
+
+    cards = playable(state)
+    return random.choice(cards) if cards else None
+
+
+def rollout(state, policies, max_turns=1000):
+    """
+    Plays the state to the end in place with a policy per seat, a function of the state
+    returning an action. Returns the winner, or -1 after max_turns turns.
+    """
+
+    for i in range(max_turns):
+        if state.winner >= 0: break
+        step(state, policies[state.active](state))
+
+    return state.winner
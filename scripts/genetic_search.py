@@ -1,12 +1,53 @@
 """
 A genetic algorithm that solves the search problem of optimizing the hyperparameters
-used by the strategy agent. Utilizes multi-threading for quicker execution
+used by the strategy agent. Fitness can be evaluated on a pool of worker processes
+for quicker execution
 """
 
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from math import log, sqrt
 import random
 import strategy_agent as sa
 import environment as uno
 
+
+"""
+Fitness function of the search run by a worker process, set once per worker so that
+only genomes are shipped to the workers.
+"""
+worker_struggle = None
+
+def init_worker(struggle):
+    global worker_struggle
+    worker_struggle = struggle
+
+def evaluate_genome(genome, seed=None):
+    return struggle_agent(worker_struggle, sa.StrategicAgent({"model": None, "parameters": genome}), seed)
+
+def struggle_agent(struggle, agent, seed):
+    if seed is None:
+        return struggle(agent)[0]
+    return struggle(agent, seed)[0]
+
+
+class TournamentFitness:
+
+    """
+    A picklable struggle function: the fitness of an agent is the number of games it
+    wins in a tournament against an opponent (None plays randomly). Called with a seed,
+    as the search does with common_seeds, the tournament plays the deals of that seed,
+    and with mirror every deal is played twice with swapped seats.
+    """
+    def __init__(self, games, opponent=None, mirror=False):
+        self.games = games
+        self.opponent = opponent
+        self.mirror = mirror
+
+    def __call__(self, agent, seed=None):
+        run = uno.tournament(self.games, agent, self.opponent, False, seed, self.mirror and seed is not None)
+        return (run[0].count(agent.name), agent)
+
+
 class GeneticSearch:
 
     """
@@ -60,16 +101,200 @@ class GeneticSearch:
     and repeating the cycle for however many generations specified.
     """
     def run_search(self):
-        for i in range(0, self.generations):
-            generation = sorted(map(self.struggle, self.population), key=lambda x: x[0], reverse=True)
-            winner = generation[0][1]
+        if self.steady_state:
+            self.run_steady_state()
+            return
+
+        if self.workers > 1:
+            self.pool = self.open_pool()
+
+        try:
+            for i in range(0, self.generations):
+                self.draw_seed()
+                generation = sorted(self.evaluate(self.population), key=lambda x: x[0], reverse=True)
+                self.crown(generation[0][1], i)
+                self.population = self.regenerate(generation)
+
+        finally:
+            self.close_pool()
+
+    """
+    Evaluates the fitness of each individual of the population. With the fitness cache
+    individuals whose genome was scored before, such as the carried over fittest, are
+    not evaluated again, unless accumulate is set. Then their new score is added to the
+    cached scores and the fitness is the mean over all evaluations of the genome.
+    Returns a list of tuples (fitness, agent) in the order of the population.
+    """
+    def evaluate(self, population):
+        if self.racing is not None:
+            return self.race(population)
+
+        if self.cache is None:
+            return list(zip(self.score(population), population))
+
+        keys = [tuple(agent.h) for agent in population]
+        new = [agent for agent, key in zip(population, keys) if self.accumulate or key not in self.cache]
+
+        for agent, score in zip(new, self.score(new)):
+            total, n = self.cache.get(tuple(agent.h), (0, 0))
+            self.cache[tuple(agent.h)] = (total + score, n + 1)
+
+        # Only genomes of the current population can be seen again
+        self.cache = {key: self.cache[key] for key in keys}
+
+        return [(self.cache[key][0] / self.cache[key][1], agent) for agent, key in zip(population, keys)]
+
+    """
+    Races the individuals of the population for the places of the fittest, i.e. the
+    carried over and reproducing individuals. In each of race_rounds rounds every
+    individual still in the race plays one struggle, afterwards individuals without a
+    chance to make it are dropped:
+    - "halving": the worse half of the individuals is dropped (successive halving)
+    - "hoeffding": individuals whose upper confidence bound lies below the lower bound
+      of the last fit place are dropped. Bounds are Hoeffding bounds on the win rate over
+      the single games of all struggles played (score_range games per struggle) that hold
+      together with probability race_confidence.
+    Once only the fittest are left, they keep playing the remaining rounds, so the games
+    saved on hopeless individuals are spent on the contenders. With the cache, earlier
+    scores of a genome count as rounds already played.
+    Fitness is the tuple (rounds played, mean score), so survivors rank before dropped
+    individuals.
+    """
+    def race(self, population):
+        keys = [tuple(agent.h) for agent in population]
+        stats = [list(self.cache.get(key, (0, 0))) if self.cache is not None else [0, 0] for key in keys]
+        rounds = [0]*len(population)
+        alive = list(range(len(population)))
+        keep = max(self.carryover, int(self.fitness * self.pop_size), 1)
+        delta = (1 - self.race_confidence) / (self.race_rounds * len(population))
+
+        mean = lambda i: stats[i][0] / stats[i][1]
+        # The score of a struggle is the number of its score_range games won, each in [0, 1],
+        # so the bound is built for the win rate over all games played and scaled back
+        radius = lambda i: self.score_range * sqrt(log(2 / delta) / (2 * stats[i][1] * self.score_range))
+
+        for r in range(self.race_rounds):
+            self.draw_seed()
+            for i, score in zip(alive, self.score([population[i] for i in alive])):
+                stats[i][0] += score
+                stats[i][1] += 1
+                rounds[i] = r + 1
+
+            if len(alive) <= keep:
+                continue
 
-            if winner != self.winner:
-                self.winner_changed.append(i)
-                self.winner = winner
+            alive.sort(key=mean, reverse=True)
+            if self.racing == "halving":
+                alive = alive[:max(keep, (len(alive) + 1) // 2)]
+            else:
+                bar = sorted([mean(i) - radius(i) for i in alive], reverse=True)[keep - 1]
+                alive = [i for i in alive if mean(i) + radius(i) >= bar]
 
-            self.population = self.regenerate(generation)
+        if self.cache is not None:
+            self.cache = {key: tuple(stat) for key, stat in zip(keys, stats)}
 
+        return [((rounds[i], mean(i)), population[i]) for i in range(len(population))]
+
+    """
+    Plays the struggle of each individual and returns the scores. With a pool of workers
+    only the genomes are sent to the workers, which return the fitness scores.
+    """
+    def score(self, population):
+        self.evaluations += len(population)
+
+        if self.pool is None:
+            return [struggle_agent(self.struggle, agent, self.seed) for agent in population]
+
+        genomes = [agent.h for agent in population]
+        return list(self.pool.map(evaluate_genome, genomes, [self.seed]*len(genomes)))
+
+    """
+    With common random numbers, draws the seed of the deals that all individuals of the
+    next generation play, so that their fitness scores are compared on the same deals.
+    """
+    def draw_seed(self):
+        if self.common_seeds:
+            self.seed = random.getrandbits(32)
+
+    """
+    Runs an asynchronous steady-state variant of the search. Instead of waiting for a
+    whole generation, every finished evaluation is ranked into the population right
+    away, the least fit individual is dropped and a new offspring of two fit
+    neighbors is submitted to the free worker. The search stops after as many
+    evaluations as generations * pop_size, winner_changed then records the number of
+    evaluations after which the winner changed. With common_seeds a new deal seed is
+    drawn after every pop_size submitted evaluations.
+    """
+    def run_steady_state(self):
+        self.pool = self.open_pool()
+        budget = self.generations * self.pop_size
+        ranked = []
+
+        try:
+            self.draw_seed()
+            pending = {self.pool.submit(evaluate_genome, agent.h, self.seed): agent for agent in self.population}
+            submitted, done_count = len(pending), 0
+            self.evaluations += len(pending)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    agent = pending.pop(future)
+                    done_count += 1
+                    ranked.append((future.result(), agent))
+                    ranked.sort(key=lambda x: x[0], reverse=True)
+                    del ranked[self.pop_size:]
+                    self.crown(ranked[0][1], done_count)
+
+                    if submitted < budget:
+                        if submitted % self.pop_size == 0:
+                            self.draw_seed()
+                        child = self.breed(ranked)
+                        pending[self.pool.submit(evaluate_genome, child.h, self.seed)] = child
+                        submitted += 1
+                        self.evaluations += 1
+
+        finally:
+            self.close_pool()
+
+        self.population = [agent for _, agent in ranked]
+
+    """
+    Produces an offspring of two neighbors in terms of fitness score, picked among the
+    fit fraction of the ranked individuals.
+    """
+    def breed(self, ranked):
+        fit = max(min(int(self.fitness * len(ranked)), len(ranked)), 2)
+        k = random.randrange(0, max(fit // 2, 1))
+        mother = ranked[min(2*k, len(ranked)-1)][1]
+        father = ranked[min(2*k+1, len(ranked)-1)][1]
+        return self.reproduce(mother, father)
+
+    """
+    Records a new winner, together with the round in which it took the lead.
+    """
+    def crown(self, winner, i):
+        if winner != self.winner:
+            self.winner_changed.append(i)
+            self.winner = winner
+
+    """
+    Opens the pool of worker processes, each worker receives the fitness function once.
+    """
+    def open_pool(self):
+        return ProcessPoolExecutor(max_workers = self.workers,
+                                   initializer = init_worker,
+                                   initargs    = (self.struggle,))
+
+
+    """
+    Shuts the pool of worker processes down, if open, also when a struggle raised.
+    """
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
 
     """
     Populates the search environment with the primordial generation, using adam
@@ -104,22 +329,64 @@ class GeneticSearch:
     # mutation_coeff (0, 1): the value used in the calculation p + p/mutation_coefficient
       in the reproduce() method. (See mathod comment for details)
     # fitness (0, 1): the fraction of the population deemed "fit" to reproduce
+    # workers: number of worker processes evaluating the fitness, 1 evaluates serially.
+      The struggle function has to be picklable, i.e. defined at module level.
+    # steady_state: runs the asynchronous steady-state search (see run_steady_state())
+      instead of generation by generation, always on a pool of workers, not together
+      with cache, accumulate or racing
+    # cache: keeps the fitness of each genome, so that individuals carried over are
+      not evaluated again. With common_seeds the cached scores come from the deals of
+      older seeds, so the cache then requires accumulate or racing
+    # accumulate: with the cache, carried over individuals are evaluated again and
+      the fitness becomes the mean over all their evaluations
+    # common_seeds: every individual of a generation plays the same seeded deals, the
+      struggle is then called as struggle(agent, seed) (see TournamentFitness)
+    # racing (None, "halving", "hoeffding"): evaluates each generation as a race that
+      stops playing struggles for individuals out of the running (see race())
+    # race_rounds: the maximum number of struggles per individual and generation
+    # race_confidence (0, 1): the confidence of the Hoeffding bounds
+    # score_range: the number of games of one struggle, each won game scores 1,
+      defaults to struggle.games
 
 
     Object Fields
     ----------------------------------------------------------------------------
     # population: a list of individuals that constitute the last generation
     # winner: the most fit individual of the population
-    # winner_changed: a list of rounds where the winner changed
+    # winner_changed: a list of rounds where the winner changed, in the steady-state
+      search the numbers of evaluations
+    # evaluations: the number of struggles played
     """
     def __init__(self, adam, generations, pop_size, struggle, carryover=50,
-    mutation_coeff=.25, fitness=.25):
+    mutation_coeff=.25, fitness=.25, workers=1, steady_state=False, cache=False,
+    accumulate=False, common_seeds=False, racing=None, race_rounds=8,
+    race_confidence=.95, score_range=None):
         self.generations = generations
         self.pop_size = pop_size
         self.struggle = struggle
         self.carryover = carryover
         self.mutation_coeff = mutation_coeff
         self.fitness = fitness
+        self.workers = workers
+        self.steady_state = steady_state
+        self.pool = None
+        self.cache = dict() if cache else None
+        self.accumulate = accumulate
+        self.common_seeds = common_seeds
+        self.seed = None
+        self.racing = racing
+        self.race_rounds = race_rounds
+        self.race_confidence = race_confidence
+        self.score_range = score_range if score_range is not None else getattr(struggle, "games", None)
+        self.evaluations = 0
+
+        if (racing == "hoeffding") and (self.score_range is None):
+            raise ValueError("Hoeffding racing requires the score_range of the struggle")
+        if steady_state and (cache or accumulate or racing is not None):
+            raise ValueError("The steady-state search does not support cache, accumulate or racing")
+        if cache and common_seeds and not (accumulate or racing is not None):
+            raise ValueError("With common_seeds the cache requires accumulate or racing, "
+                             "cached scores would be compared across different deals")
         self.population = self.genesis(adam)
         self.winner = None
         self.winner_changed = []
@@ -0,0 +1,184 @@
+"""
+Round-robin league of many agents. Every pairing of the roster plays the same number of
+games, scheduled in rounds of chunks over a pool of worker processes, and the agents are
+rated with Elo, updated game by game in schedule order. Each worker builds the agents of the
+roster once, so models are loaded once per worker and not per match.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+import q_learning_agent as qagent
+import strategy_agent as sagent
+
+# Public libraries
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import time
+import os
+
+
+# 2. Roster
+# -------------------------------------------------------------------------
+
+def build_agent(spec):
+    """
+    Builds the agent of a roster entry, which is one of:
+        - None, the random player
+        - a list of parameters, a strategic genome
+        - an agent
+        - a tuple (agent class, agent_init_info), built where it is played
+    """
+
+    if isinstance(spec, tuple):
+        return spec[0](spec[1])
+
+    if isinstance(spec, list):
+        return sagent.StrategicAgent({"model": None, "parameters": spec})
+
+    return spec
+
+
+def load_models(directory="../assets/models", epsilon=.1):
+    """
+    Returns roster entries of the saved models in directory, keyed by the name of their
+    subdirectory: Q-learning models (model.npy or model-q.csv) as agents that do not learn,
+    other models (model) as strategic agents, e.g. the winners of a genetic search.
+    """
+
+    roster = dict()
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name, "model")
+
+        if os.path.exists(path + ".npy") or os.path.exists(path + "-q.csv"):
+            roster[name] = (qagent.QLearningAgent, {"epsilon": epsilon, "gamma": .2, "alpha": 0,
+                                                    "model": path, "learn": False})
+        elif os.path.exists(path):
+            roster[name] = (sagent.StrategicAgent, {"model": path, "parameters": None})
+
+    return roster
+
+
+# Agents of the league played by a worker process, keyed by name
+worker_roster = dict()
+
+def init_worker(roster):
+    global worker_roster
+    worker_roster = {name: build_agent(spec) for name, spec in roster.items()}
+
+
+def play_chunk(chunk):
+    """
+    Plays games start to stop of the seeded tournament of a pairing, returns the winners.
+    """
+
+    name1, name2, start, stop, seed = chunk
+    agent1, agent2 = worker_roster[name1], worker_roster[name2]
+
+    return [winner for winner, turns, game in uno.stream_tournament(stop, agent1, agent2, seed, start = start)]
+
+
+# 3. Ratings
+# -------------------------------------------------------------------------
+
+class Elo(object):
+    """
+    Elo ratings, updated after every game with factor k.
+    """
+
+    def __init__(self, names, k=16, initial=1500):
+        self.k = k
+        self.ratings = {name: float(initial) for name in names}
+
+    def expected(self, name1, name2):
+        return 1 / (1 + 10**((self.ratings[name2] - self.ratings[name1]) / 400))
+
+    def update(self, name1, name2, score):
+        """
+        Updates the ratings after a game of name1 against name2, score 1 if name1 won, else 0.
+        """
+
+        change = self.k * (score - self.expected(name1, name2))
+        self.ratings[name1] += change
+        self.ratings[name2] -= change
+
+
+# 4. League
+# -------------------------------------------------------------------------
+
+class League(object):
+
+    def __init__(self, roster, k=16):
+        """
+        Initializes the league of a roster.
+        Required parameters: roster as dict of roster entries (see build_agent) keyed by name
+        Optional parameters: k as float, the Elo factor
+        """
+
+        uno.refuse_learning([build_agent(spec) for spec in roster.values()], "leagues")
+
+        self.roster = roster
+        self.pairs  = list(combinations(roster, 2))
+        self.elo    = Elo(roster, k)
+        self.wins   = {pair: [0, 0] for pair in self.pairs}
+        self.games  = 0
+
+    def play(self, games, seed=0, workers=None, chunk_size=100):
+        """
+        Plays games games per pairing and updates wins and ratings. Games are played in
+        rounds: in every round each pairing plays its next chunk of chunk_size games, which
+        alternate the starting seat as in uno.tournament. Each pairing plays its own seeded
+        tournament and results are applied in schedule order, so wins and ratings do not
+        depend on the number of workers. Playing again with the same seed replays the games.
+        Required parameters: games as int, rounded up to an even number
+        Optional parameters:
+            - seed as int
+            - workers as int, defaults to the number of cores
+            - chunk_size as int, rounded up to an even number
+        Returns the time played in seconds.
+        """
+
+        timer_start = time.time()
+
+        games += games%2
+        chunk_size += chunk_size%2
+
+        chunks = [(name1, name2, start, min(start + chunk_size, games), uno.game_seed(seed, k))
+                  for start in range(0, games, chunk_size)
+                  for k, (name1, name2) in enumerate(self.pairs)]
+
+        with ProcessPoolExecutor(max_workers = workers,
+                                 initializer = init_worker,
+                                 initargs    = (self.roster,)) as executor:
+
+            for (name1, name2, *_), winners in zip(chunks, executor.map(play_chunk, chunks)):
+                wins = self.wins[(name1, name2)]
+                for winner in winners:
+                    wins[winner] += 1
+                    self.elo.update(name1, name2, 1 - winner)
+
+                self.games += len(winners)
+
+        # Timer
+        timer_end = time.time()
+        timer = timer_end - timer_start
+
+        return timer
+
+    def standings(self):
+        """
+        Returns a list of (name, rating, wins, games) sorted by rating.
+        """
+
+        wins  = dict.fromkeys(self.roster, 0)
+        games = dict.fromkeys(self.roster, 0)
+        for (name1, name2), (wins1, wins2) in self.wins.items():
+            wins[name1] += wins1
+            wins[name2] += wins2
+            games[name1] += wins1 + wins2
+            games[name2] += wins1 + wins2
+
+        return sorted(((name, self.elo.ratings[name], wins[name], games[name]) for name in self.roster),
+                      key = lambda row: row[1], reverse = True)
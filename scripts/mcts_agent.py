@@ -0,0 +1,210 @@
+"""
+Monte Carlo agent that searches its moves with rollouts on game_state.py. Every rollout plays
+one of the playable cards in a determinization of the game (the unknown cards dealt at random
+to the opponent's hand and the draw pile) and finishes the game with a rollout policy. The
+rollouts are spread over the candidate cards with UCB1, so it is a one-level Monte Carlo tree
+search over determinizations; the card with the highest win rate is played.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+import game_state as gs
+
+# Public libraries
+from collections import Counter
+from math import log, sqrt
+import random
+import time
+
+
+# 2. Rollout Policies
+# -------------------------------------------------------------------------
+
+def gravity_policy(h, color_count, value_count, card_count):
+    """
+    Returns a rollout policy that plays like a StrategicAgent with parameters h: the card with
+    the highest gravity score, with the open cards seen so far in the game, per color and per
+    value code, and their number as seen counts for the whole rollout.
+    """
+
+    color_seen = [1 + n for n in color_count]
+    value_seen = [1 + n for n in value_count]
+    special = {uno.VALUE_CODE[v]: h[2 + 2*i] + h[3 + 2*i]*card_count
+               for i, v in enumerate(["SKI", "REV", "PL2", "PL4", "COL"])}
+
+    def policy(state):
+        hand = state.hands[state.active]
+        cards = gs.playable(state)
+        if not cards: return None
+
+        colors, values = [0]*5, [0]*16
+        for code in hand:
+            colors[code >> 4] += 1
+            values[code & 0x0F] += 1
+
+        best, best_score = None, None
+        for code in cards:
+            color, value, x = code >> 4, code & 0x0F, 0
+            if value >= gs.PL4:
+                color, x = gs.choose_color(hand), 1
+
+            score = h[0]*(x + colors[color])*color_seen[color] + h[1]*values[value]*value_seen[value]
+            score += special.get(value, 0)
+
+            if (best_score is None) or (best_score < score):
+                best, best_score = code, score
+
+        return best
+
+    return policy
+
+
+# 3. MCTS Agent
+# -------------------------------------------------------------------------
+
+class MCTSAgent(object):
+
+    name = "mcts"
+    update = False
+
+    def __init__(self, agent_init_info):
+        """
+        Initializes the search parameters.
+        Required parameters: agent_init_info as dict
+        Optional keys of agent_init_info:
+            - rollouts as int, rollout budget per move (default 100)
+            - time_limit as float, seconds per move, stops the search early (default None)
+            - policy as StrategicAgent, whose parameters the gravity rollout policy of both
+              seats uses, random play if None
+            - exploration as float, UCB1 exploration constant (default sqrt(2))
+            - max_turns as int, rollouts longer than this count as lost (default 1000)
+        """
+
+        self.budget      = agent_init_info.get("rollouts", 100)
+        self.time_limit  = agent_init_info.get("time_limit", None)
+        self.policy      = agent_init_info.get("policy", None)
+        self.exploration = agent_init_info.get("exploration", sqrt(2))
+        self.max_turns   = agent_init_info.get("max_turns", 1000)
+
+        # Open cards seen in the current game, per color, per value and in total
+        self.reset()
+
+        # Throughput of the search over the lifetime of the agent and of the last move
+        self.rollouts    = 0
+        self.search_time = 0.0
+        self.last_move   = {"rollouts": 0, "seconds": 0.0}
+
+    def step(self, player, open_card):
+        """
+        Searches the playable cards of player and returns the card to play.
+        Required parameters:
+            - player as Player, with its opponent set
+            - open_card as card
+        """
+
+        self.color_count[open_card.code >> 4] += 1
+        self.value_count[open_card.code & 0x0F] += 1
+        self.card_count += 1
+
+        player.evaluate_hand(open_card)
+        actions = list(dict.fromkeys(card.code for card in player.hand_play))
+
+        if len(actions) == 1:
+            return uno.CARDS[actions[0]]
+
+        if self.policy is None:
+            policies = [gs.random_policy]*2
+        else:
+            policies = [gravity_policy(self.policy.h, self.color_count, self.value_count, self.card_count)]*2
+
+        code = self.search(player, open_card, actions, policies)
+        return uno.CARDS[code]
+
+    def search(self, player, open_card, actions, policies):
+        """
+        Spreads the rollout budget over the actions with UCB1 and returns the action with the
+        highest win rate. Every action gets at least one rollout, also past the time limit or
+        the rollout budget.
+        """
+
+        timer_start = time.perf_counter()
+        deadline = None if self.time_limit is None else timer_start + self.time_limit
+
+        hand    = bytearray(card.code for card in player.hand)
+        unknown = self.unknown_cards(hand, open_card)
+        n_opp   = len(player.opponent.hand)
+
+        wins, visits = [0]*len(actions), [0]*len(actions)
+        n = 0
+
+        while n < max(self.budget, len(actions)):
+            if (n >= len(actions)) and (deadline is not None) and (time.perf_counter() > deadline):
+                break
+
+            if n < len(actions):
+                i = n
+            else:
+                c = self.exploration * sqrt(log(n))
+                i = max(range(len(actions)), key = lambda a: wins[a]/visits[a] + c/sqrt(visits[a]))
+
+            state = self.determinize(hand, unknown, n_opp, open_card.code)
+            gs.step(state, actions[i])
+            winner = gs.rollout(state, policies, self.max_turns)
+
+            wins[i]   += winner == 0
+            visits[i] += 1
+            n += 1
+
+        seconds = time.perf_counter() - timer_start
+        self.rollouts    += n
+        self.search_time += seconds
+        self.last_move    = {"rollouts": n, "seconds": seconds}
+
+        return actions[max(range(len(actions)), key = lambda a: wins[a]/visits[a])]
+
+    def unknown_cards(self, hand, open_card):
+        """
+        Returns the cards the player can not see, all cards of the deck except its hand and the
+        open card (a wild open card as WILD). The agent does not track the discard pile, so cards
+        played earlier count as unknown too and may be dealt to the opponent's hand in a
+        determinization, which the opponent can in fact not hold.
+        """
+
+        open_code = open_card.code
+        if (open_code & 0x0F) >= gs.PL4: open_code = gs.WILD*16 + (open_code & 0x0F)
+
+        unknown = Counter(uno.DECK_CODES)
+        unknown.subtract(hand)
+        unknown[open_code] -= 1
+
+        return bytearray(code for code, count in unknown.items() for i in range(max(count, 0)))
+
+    def determinize(self, hand, unknown, n_opp, open_code):
+        """
+        Returns a game state with the player in seat 0 to play, in which the unknown cards
+        are shuffled and dealt to the opponent's hand and the draw pile.
+        """
+
+        cards = bytearray(unknown)
+        random.shuffle(cards)
+
+        return gs.GameState([bytearray(hand), cards[len(cards) - n_opp:]], cards[:len(cards) - n_opp],
+                            bytearray(), open_code, 0)
+
+    def throughput(self):
+        """
+        Returns the rollouts per second over all searches of the agent.
+        """
+
+        return self.rollouts / self.search_time if self.search_time > 0 else 0.0
+
+    def reset(self):
+        self.color_count = [0]*len(uno.COLORS)
+        self.value_count = [0]*16
+        self.card_count  = 0
+
+    def save_model(self, path=None):
+        pass
@@ -0,0 +1,347 @@
+"""
+Distributed training of the Q-learning agent. Actor processes play games with a local,
+periodically synced copy of the Q-table and send their transitions to the learner, the
+calling process, which owns the table, applies the transitions in batches and publishes new
+versions of the Q-values in shared memory. Training thereby scales with the number of cores.
+Alternatively, in Hogwild training every worker process learns on one shared Q-table, with
+unsynchronized writes or striped locks.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+import state_action_reward as sar
+from q_learning_agent import QLearningAgent
+from q_table import QTable
+
+# Public libraries
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import queue
+import time
+
+
+# 2. Actor
+# -------------------------------------------------------------------------
+
+class ActorAgent(QLearningAgent):
+    """
+    Q-learning agent of an actor process. It plays with a local copy of the published Q-values
+    and, instead of learning its transitions, sends them to the learner every sync games,
+    when it also picks up the latest published version.
+    """
+
+    def __init__(self, agent_init_info, transitions, published, version):
+        """
+        Required parameters:
+            - agent_init_info as dict, "batch" is the number of games between syncs
+            - transitions as multiprocessing.Queue to the learner
+            - published as QTable attached to the published Q-values
+            - version as multiprocessing.Value, increased by the learner on every publication,
+              its lock is held while the learner writes and while an actor copies the Q-values
+        """
+
+        super().__init__(dict(agent_init_info, model = None, learn = True))
+
+        self.transitions = transitions
+        self.published   = published
+        self.version     = version
+        self.synced      = -1
+        self.sync()
+
+    def sync(self):
+        with self.version.get_lock():
+            if self.version.value != self.synced:
+                self.synced = self.version.value
+                np.copyto(self.q, self.published.q)
+
+    def learn_batch(self):
+        idx = self.buffer.take_pending()
+        if len(idx):
+            self.transitions.put(np.stack(self.buffer.transitions(idx)).astype(np.int32))
+        self.sync()
+
+
+# Actor of a worker process and its opponent
+worker_actor = (None, None)
+
+def init_actor(agent_init_info, opponent, transitions, name, version):
+    global worker_actor
+    published = QTable(sar.actions())
+    published.attach(name)
+    worker_actor = (ActorAgent(agent_init_info, transitions, published, version), opponent)
+
+
+def play_actor_chunk(chunk):
+    """
+    Plays the games of a chunk and flushes the remaining transitions, followed by None to tell
+    the learner that the chunk is complete.
+    """
+
+    start, stop, seed = chunk
+    actor, opponent = worker_actor
+
+    winners, turns = uno.play_games(start, stop, actor, opponent, seed)
+
+    actor.learn_batch()
+    actor.transitions.put(None)
+
+    return winners, turns
+
+
+# 3. Learner
+# -------------------------------------------------------------------------
+
+def train(iterations, learner, opponent, seed=0, workers=None, chunk_size=1000, sync=100, publish=1):
+    """
+    Trains learner in a tournament against opponent that is played by a pool of actor processes.
+    The learner applies the transitions of the actors as batch updates (see QTable.batch_update)
+    and publishes its Q-values after every publish batches. As actors play with the version they
+    synced last, results are not reproducible the way parallel_tournament is, even with a seed.
+    Required parameters:
+        - iterations as int
+        - learner as QLearningAgent with learn = True
+        - opponent as agent or None, must not learn
+    Optional parameters:
+        - seed as int
+        - workers as int, number of actors, defaults to the number of cores
+        - chunk_size as int
+        - sync as int, games an actor plays between sending transitions and syncing
+        - publish as int, batches the learner applies between publications
+    Returns winners, turns and timer like uno.tournament.
+    """
+
+    if not learner.learn:
+        raise ValueError(f'{learner.name} does not learn, training requires learn = True')
+
+    uno.refuse_learning([opponent], "opponents in training")
+
+    timer_start = time.time()
+
+    learner.learn_batch()
+    table = learner.table
+
+    published = QTable(table.actions, table.space)
+    published.q[:] = table.q
+    block = published.share()
+
+    context     = multiprocessing.get_context()
+    transitions = context.Queue()
+    version     = context.Value("q", 0)
+
+    actor_info = {"epsilon": learner.epsilon,
+                  "gamma"  : learner.gamma,
+                  "alpha"  : learner.alpha,
+                  "batch"  : sync}
+
+    winners, turns = list(), list()
+    chunks = [(i, min(i + chunk_size, iterations), seed) for i in range(0, iterations, chunk_size)]
+
+    try:
+        with ProcessPoolExecutor(max_workers = workers,
+                                 mp_context  = context,
+                                 initializer = init_actor,
+                                 initargs    = (actor_info, opponent, transitions, block.name, version)) as executor:
+
+            futures = [executor.submit(play_actor_chunk, chunk) for chunk in chunks]
+            complete, batches = 0, 0
+
+            while complete < len(chunks):
+                try:
+                    batch = transitions.get(timeout = 1)
+                except queue.Empty:
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()
+                    continue
+
+                if batch is None:
+                    complete += 1
+                    continue
+
+                table.batch_update(*batch, learner.gamma, learner.alpha)
+                batches += 1
+
+                # Actors copy under the same lock, so they never read a half written version
+                if batches % publish == 0:
+                    with version.get_lock():
+                        np.copyto(published.q, table.q)
+                        version.value += 1
+
+            for future in futures:
+                chunk_winners, chunk_turns = future.result()
+                winners.extend(chunk_winners)
+                turns.extend(chunk_turns)
+
+    finally:
+        del published
+        block.close()
+        block.unlink()
+
+    # Timer
+    timer_end = time.time()
+    timer = timer_end - timer_start
+
+    return winners, turns, timer
+
+
+# 4. Hogwild
+# -------------------------------------------------------------------------
+
+# Learning agent of a worker process and its opponent
+worker_learner = (None, None)
+
+def set_reward(agent, reward):
+    """
+    Replaces the rewards of agent by reward, an array of rewards per state, for all actions.
+    """
+
+    agent.R = agent.table.R = np.broadcast_to(np.asarray(reward, dtype = np.float64)[:, None], agent.q.shape)
+
+
+def random_reward(seed=0):
+    """
+    Returns a seeded standard normal reward per state. As the rewards of the model only fire
+    in states with an empty hand, which play never reaches, it makes Q-values of trained
+    agents differ from zero, e.g. for compare_convergence.
+    """
+
+    return np.random.default_rng(seed).standard_normal(len(QTable(sar.actions()).space))
+
+
+def init_learner(agent_init_info, opponent, name, locks, reward=None):
+    global worker_learner
+    agent = QLearningAgent(dict(agent_init_info, model = None, learn = True))
+    agent.attach(name, locks)
+    if reward is not None: set_reward(agent, reward)
+    worker_learner = (agent, opponent)
+
+
+def play_learner_chunk(chunk):
+    start, stop, seed = chunk
+    agent, opponent = worker_learner
+
+    return uno.play_games(start, stop, agent, opponent, seed)
+
+
+def train_hogwild(iterations, learner, opponent, seed=0, workers=None, chunk_size=1000, locks=0, reward=None):
+    """
+    Trains learner in a tournament against opponent that is played by a pool of worker processes,
+    which all apply their updates to one Q-table in shared memory. With locks = 0 the updates
+    are unsynchronized (Hogwild): concurrent updates of the same state-action pair can get lost,
+    which is rare as updates are sparse in the state space. Otherwise states are striped over
+    locks locks, of which an update holds the one of its state. The shared tables are copied
+    into the table of learner at the end.
+    Required parameters:
+        - iterations as int
+        - learner as QLearningAgent with learn = True
+        - opponent as agent or None, must not learn
+    Optional parameters:
+        - seed as int
+        - workers as int, defaults to the number of cores
+        - chunk_size as int
+        - locks as int, number of striped locks, 0 for Hogwild
+        - reward as array of rewards per state, replaces the rewards of the model (see set_reward)
+    Returns winners, turns and timer like uno.tournament.
+    """
+
+    if not learner.learn:
+        raise ValueError(f'{learner.name} does not learn, training requires learn = True')
+
+    uno.refuse_learning([opponent], "opponents in training")
+
+    timer_start = time.time()
+
+    learner.learn_batch()
+    table = learner.table
+
+    shared = QTable(table.actions, table.space)
+    shared.q[:], shared.visit[:] = table.q, table.visit
+    block = shared.share()
+
+    context = multiprocessing.get_context()
+    stripes = [context.Lock() for _ in range(locks)] if locks else None
+
+    learner_info = {"epsilon": learner.epsilon,
+                    "gamma"  : learner.gamma,
+                    "alpha"  : learner.alpha}
+
+    winners, turns = list(), list()
+    chunks = [(i, min(i + chunk_size, iterations), seed) for i in range(0, iterations, chunk_size)]
+
+    try:
+        with ProcessPoolExecutor(max_workers = workers,
+                                 mp_context  = context,
+                                 initializer = init_learner,
+                                 initargs    = (learner_info, opponent, block.name, stripes, reward)) as executor:
+
+            for chunk_winners, chunk_turns in executor.map(play_learner_chunk, chunks):
+                winners.extend(chunk_winners)
+                turns.extend(chunk_turns)
+
+        np.copyto(table.q, shared.q)
+        np.copyto(table.visit, shared.visit)
+
+    finally:
+        del shared
+        block.close()
+        block.unlink()
+
+    # Timer
+    timer_end = time.time()
+    timer = timer_end - timer_start
+
+    return winners, turns, timer
+
+
+# 5. Convergence
+# -------------------------------------------------------------------------
+
+def compare_convergence(iterations, agent_init_info, opponent, seed=0, workers=None, locks=64, reward=None,
+                        chunk_size=1000):
+    """
+    Trains fresh agents from agent_init_info serially, with Hogwild and with striped locks on
+    the same seeded games and compares the parallel tables with the serial ones. Reported per
+    backend are the training time, the total visits (lost updates show up as missing visits),
+    the largest and the total absolute difference of the visits per state-action pair, and the
+    largest and the mean absolute difference of the Q-values to the serial learner, the mean
+    over the state-action pairs the serial learner visited. With the rewards of the model all
+    Q-values stay zero in play, pass a reward such as random_reward() to compare Q-values.
+    Required parameters:
+        - iterations as int
+        - agent_init_info as dict, the model is ignored
+        - opponent as agent or None
+    Optional parameters:
+        - seed, workers, locks as int
+        - reward as array of rewards per state (see set_reward)
+        - chunk_size as int, games per chunk of the parallel backends, tournaments of a single
+          chunk are played serially by one worker
+    Returns a dict of dicts, keyed by backend.
+    """
+
+    agent_init_info = dict(agent_init_info, model = None, learn = True)
+
+    serial = QLearningAgent(agent_init_info)
+    if reward is not None: set_reward(serial, reward)
+    timer  = uno.tournament(iterations, serial, opponent, False, seed)[2]
+    visited = serial.visit > 0
+
+    results = {"serial": {"time": timer, "visits": serial.visit.sum()}}
+
+    for backend, stripes in [("hogwild", 0), ("striped", locks)]:
+        agent = QLearningAgent(agent_init_info)
+        timer = train_hogwild(iterations, agent, opponent, seed, workers, chunk_size, stripes, reward)[2]
+
+        visits     = np.abs(agent.visit - serial.visit)
+        difference = np.abs(agent.q - serial.q)
+        results[backend] = {"time"                   : timer,
+                            "visits"                 : agent.visit.sum(),
+                            "max_visit_difference"   : visits.max(),
+                            "total_visit_difference" : visits.sum(),
+                            "max_difference"         : difference.max(),
+                            "mean_difference"        : difference[visited].mean()}
+
+    return results
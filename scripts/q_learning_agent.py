@@ -3,9 +3,11 @@
 
 # Custom libraries
 import state_action_reward as sar
+import state_space
+from q_table import QTable
+from replay_buffer import ReplayBuffer
 
 # Public libraries
-import pandas as pd
 import numpy as np
 import random
 
@@ -22,61 +24,50 @@ class QLearningAgent(object):
         """
         Initializes the agent to get parameters and import/create q-tables.
         Required parameters: agent_init_info as dict
+        Optional keys of agent_init_info:
+            - batch as int, learns from a replay buffer every batch games instead of every turn
+            - buffer as int, capacity of the replay buffer (default 100000)
+            - replay as int, transitions replayed from the buffer per batch (default 0)
+            - priority as bool, replays transitions proportional to their TD error
         """
 
         # (1) Store the parameters provided in agent_init_info
-        self.states      = sar.states()
+        self.space       = state_space.load()
         self.actions     = sar.actions()
-        self.prev_state  = 0
-        self.prev_action = 0
+        self.prev_state  = None
+        self.prev_action = None
 
         self.epsilon     = agent_init_info["epsilon"]
         self.gamma       = agent_init_info["gamma"]
         self.alpha       = agent_init_info["alpha"]
         self.model       = agent_init_info["model"]
         self.learn       = agent_init_info["learn"]
-        self.R           = sar.rewards(self.states, self.actions)
 
+        self.batch       = agent_init_info.get("batch", 0)
+        self.replay      = agent_init_info.get("replay", 0)
+        self.priority    = agent_init_info.get("priority", False)
+        self.games       = 0
+        self.buffer      = None
+        self.locks       = None
 
-        # (2) Create Q-table that stores action-value estimates, initialized at zero
-        if self.model == None:
-            self.q = pd.DataFrame(data    = np.zeros((len(self.states), len(self.actions))),
-                                  columns = self.actions,
-                                  index   = self.states)
+        if self.learn and self.batch:
+            self.buffer = ReplayBuffer(agent_init_info.get("buffer", 100000))
+            self.rng    = np.random.default_rng(random.getrandbits(32))
 
-            self.visit = self.q.copy()
+        # (2) Create Q-table that stores action-value estimates, initialized at zero
+        self.table = QTable(self.actions, self.space)
 
+        # (3) Import already existing Q-values and visits table if possible,
+        # agents that do not learn share a read-only memory map of the model
+        if self.model != None:
+            self.table.load(self.model, writable = self.learn)
 
-        # (3) Import already existing Q-values and visits table if possible
-        else:
-            #try:
-            self.q            = pd.read_csv(self.model + "-q.csv", sep = ";", index_col = "Unnamed: 0")
-            self.q.index      = self.q.index.map(lambda x: eval(x))
-            self.q["IDX"]     = pd.MultiIndex.to_numpy(self.q.index)
-            self.q            = self.q.set_index("IDX", drop = True)
-            self.q.index.name = None
-
-            self.visit            = pd.read_csv(self.model + "-visits.csv", sep = ";", index_col = "Unnamed: 0")
-            self.visit.index      = self.visit.index.map(lambda x: eval(x))
-            self.visit["IDX"]     = pd.MultiIndex.to_numpy(self.visit.index)
-            self.visit            = self.visit.set_index("IDX", drop = True)
-            self.visit.index.name = None
-
-            # (3a) Create empty q-tables if file is not found
-            """
-            except:
-                print ("Existing model could not be found. New model is being created.")
-                self.q = pd.DataFrame(data    = np.zeros((len(self.states), len(self.actions))),
-                                      columns = self.actions,
-                                      index   = self.states)
-
-                self.visit = self.q.copy()
-            """
+        self.q     = self.table.q
+        self.visit = self.table.visit
+        self.R     = self.table.R
 
     def play_card(self, action, player, card_open):
 
-        if self.learn: self.update(player.state, action)
-
         # Selected action searches corresponding card
         # (1) Playing wild card
         if player.action in ["COL","PL4"]:
@@ -118,12 +109,11 @@ class QLearningAgent(object):
             - actions_dict as dict
         """
 
-        player.identify_state(open_card)
+        player.evaluate_hand(open_card)
         player.identify_action()
 
-        # (1) Transform state dictionary into tuple
-        state = [i for i in player.state.values()]
-        state = tuple(state)
+        # (1) Look up the state id of the players' state code
+        state = self.table.state_lut[player.identify_state_code(open_card)]
 
         # (2) Choose action using epsilon greedy
         # (2a) Random action
@@ -136,57 +126,113 @@ class QLearningAgent(object):
         else:
             actions_possible = [key for key,val in player.actions.items() if val != 0]
             random.shuffle(actions_possible)
-            val_max = 0
+            val_max = float("-inf")
+            q_state = self.q[state]
 
             for i in actions_possible:
-                val = self.q.loc[[state],i][0]
+                val = q_state[self.table.action_id[i]]
                 if val >= val_max:
                     val_max = val
                     action = i
 
+        if self.learn: self.update(state, self.table.action_id[action])
+
         return self.play_card(action, player, open_card)
 
 
-    def update(self, state_dict, action):
+    def update(self, state, action):
         """
         Updating Q-values according to Belman equation
         Required parameters:
-            - state_dict as dict
-            - action as str
+            - state as int (state id)
+            - action as int (action id)
         """
-        state = [i for i in state_dict.values()]
-        state = tuple(state)
-
-        # (1) Set prev_state unless first turn
-        if self.prev_state != 0:
-            prev_q = self.q.loc[[self.prev_state], self.prev_action][0]
-            this_q = self.q.loc[[state], action][0]
-            reward = self.R.loc[[state], action][0]
 
-            if self.alpha == 0:
-                alpha = self.visit.loc[[self.prev_state], self.prev_action][0]
-                alpha = 1.0/alpha if alpha != 0 else .99
-                alpha = alpha if alpha > .05 else .05
-            else:
-                alpha = self.alpha
+        # (1) Set prev_state unless first turn, batched learning only records the transition
+        if (self.prev_state is not None) and (self.buffer is not None):
+            if self.buffer.record(self.prev_state, self.prev_action, state, action):
+                self.learn_batch()
 
-            # Calculate new Q-values
-            bellman = ((1 - alpha) * prev_q) + alpha*(reward + self.gamma*(this_q))
-            self.q.loc[[self.prev_state], self.prev_action] = bellman
+        elif (self.prev_state is not None) and (self.locks is not None):
+            with self.locks[self.prev_state % len(self.locks)]:
+                self.bellman(state, action)
 
-            self.visit.loc[[self.prev_state], self.prev_action] += 1
+        elif self.prev_state is not None:
+            self.bellman(state, action)
 
         # (2) Save and return action/state
         self.prev_state  = state
         self.prev_action = action
 
+    def bellman(self, state, action):
+        """
+        Applies the Bellman update of the previous state and action, given the current ones.
+        """
+
+        prev_q = self.q[self.prev_state, self.prev_action]
+        this_q = self.q[state, action]
+        reward = self.R[state, action]
+
+        if self.alpha == 0:
+            alpha = self.visit[self.prev_state, self.prev_action]
+            alpha = 1.0/alpha if alpha != 0 else .99
+            alpha = alpha if alpha > .05 else .05
+        else:
+            alpha = self.alpha
+
+        # Calculate new Q-values
+        bellman = ((1 - alpha) * prev_q) + alpha*(reward + self.gamma*(this_q))
+        self.q[self.prev_state, self.prev_action] = bellman
+
+        self.visit[self.prev_state, self.prev_action] += 1
+
+    def attach(self, name, locks=None):
+        """
+        Learns on the Q-values and visits in the shared memory block name (see QTable.share),
+        together with agents of other processes. Without locks the agents write without any
+        synchronization (Hogwild), with locks every update holds the lock of its state's stripe.
+        Required parameters: name as str
+        Optional parameters: locks as list of multiprocessing locks
+        """
+
+        self.table.attach(name)
+        self.q     = self.table.q
+        self.visit = self.table.visit
+        self.locks = locks
+
+    def learn_batch(self):
+        """
+        Applies the transitions recorded since the last batch as one vectorized update,
+        then replays transitions sampled from the buffer, uniformly or by priority.
+        """
+
+        if self.buffer is None: return
+
+        table = self.table
+        table.batch_update(*self.buffer.transitions(self.buffer.take_pending()),
+                           self.gamma, self.alpha)
+
+        if self.replay and self.buffer.size:
+            weights = None
+            if self.priority:
+                s, a, s2, a2 = self.buffer.transitions(slice(0, self.buffer.size))
+                weights = np.abs(table.targets(s2, a2, self.gamma) - self.q[s, a]) + 1e-3
+
+            idx = self.buffer.sample(self.replay, self.rng, weights)
+            table.batch_update(*self.buffer.transitions(idx), self.gamma, self.alpha,
+                               count_visits = False)
+
     def reset(self):
-        self.prev_state = 0
+        self.prev_state = None
+
+        if self.buffer is not None:
+            self.games += 1
+            if self.games % self.batch == 0: self.learn_batch()
 
     def save_model(self, path=None):
+        self.learn_batch()
+
         if path != None:
-            self.q.to_csv(path + "-q.csv", sep = ";")
-            self.visit.to_csv(path + "-visits.csv", sep = ";")
+            self.table.save(path)
         elif self.model != None:
-            self.q.to_csv(self.model + "-q.csv", sep = ";")
-            self.visit.to_csv(self.model + "-visits.csv", sep = ";")
+            self.table.save(self.model)
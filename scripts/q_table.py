@@ -0,0 +1,255 @@
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import state_action_reward as sar
+import state_encoder as se
+import state_space
+
+# Public libraries
+from multiprocessing import shared_memory
+import pandas as pd
+import numpy as np
+import json
+import ast
+import os
+
+
+# Version of the binary model format written by QTable.save, format 1 kept the header in a
+# separate json file, format 2 embeds it in the npy file
+MODEL_FORMAT = 2
+
+
+# 2. Q-Table
+# -------------------------------------------------------------------------
+
+class QTable(object):
+    """
+    Dense Q-table backed by numpy float64 arrays. Rows are addressed by a state id and
+    columns by an action id, both precomputed from the state and action lists, so every
+    read and write is a plain integer lookup. State ids are found through state_lut,
+    which maps the state code of state_encoder to the row index. Pandas is only used to
+    export the tables.
+    """
+
+    def __init__(self, actions, space=None):
+        """
+        Creates zero initialized Q-values and visits tables as well as the reward table.
+        Required parameters: actions as list of str
+        Optional parameters: space as StateSpace, defaults to the cached state space
+        """
+
+        self.space     = space if space is not None else state_space.load()
+        self.actions   = actions
+        self.state_lut = self.space.lut
+        self.action_id = {action: i for i, action in enumerate(actions)}
+
+        self.q     = np.zeros((len(self.space), len(actions)), dtype = np.float64)
+        self.visit = np.zeros((len(self.space), len(actions)), dtype = np.float64)
+        self.R     = self.space.reward_matrix(len(actions))
+
+
+    def targets(self, next_state, next_action, gamma):
+        """
+        Returns the Bellman targets of transitions ending in next_state, next_action.
+        Required parameters: next_state, next_action as np.ndarray of ids, gamma as float
+        """
+
+        return self.R[next_state, next_action] + gamma * self.q[next_state, next_action]
+
+
+    def batch_update(self, state, action, next_state, next_action, gamma, alpha, count_visits=True):
+        """
+        Applies the Bellman updates of a batch of transitions at once. Targets are taken from
+        the Q-values before the batch. The k updates of a state-action pair are combined into
+        one step towards their mean target, with the weight the k sequential updates give to
+        the targets: 1-(1-alpha)^k for a fixed alpha, and for alpha = 0 the weight of the
+        decaying alpha 1/visits (.99 on the first visit, at least .05) given the visits so far.
+        Required parameters:
+            - state, action, next_state, next_action as np.ndarray of ids
+            - gamma, alpha as float
+        Optional parameters: count_visits as bool, False for replayed transitions, which
+        neither count as visits nor advance the decay of alpha
+        """
+
+        n_actions = len(self.actions)
+        target = self.targets(next_state, next_action, gamma)
+
+        pairs, inverse, k = np.unique(state.astype(np.int64) * n_actions + action,
+                                      return_inverse = True, return_counts = True)
+        rows, cols = np.divmod(pairs, n_actions)
+        delta = np.bincount(inverse, weights = target) / k - self.q[rows, cols]
+        visits = self.visit[rows, cols]
+
+        if alpha != 0:
+            kept = (1 - alpha) ** k
+        elif count_visits:
+            # Steps with visits below 20 use alpha 1/visits, the product telescopes
+            steps = np.clip(20 - visits, 0, k)
+            kept  = .95 ** (k - steps)
+            kept *= np.where(visits >= 1, (visits - 1) / np.maximum(visits + steps - 1, 1),
+                             np.where(steps == 1, .01, 0))
+        else:
+            fixed = np.where(visits != 0, 1.0 / np.maximum(visits, 1), .99)
+            kept  = (1 - np.maximum(fixed, .05)) ** k
+
+        self.q[rows, cols] += (1 - kept) * delta
+
+        if count_visits:
+            self.visit[rows, cols] += k
+
+
+    def share(self):
+        """
+        Moves Q-values and visits into a new shared memory block, stacked like the binary model.
+        Other processes attach the tables by the name of the block, the creator unlinks it.
+        Returns the shared_memory.SharedMemory block.
+        """
+
+        block = shared_memory.SharedMemory(create = True, size = 2 * self.q.nbytes)
+        data  = np.ndarray((2,) + self.q.shape, dtype = np.float64, buffer = block.buf)
+        data[0], data[1] = self.q, self.visit
+
+        self.q, self.visit = data[0], data[1]
+        self.block = block
+        return block
+
+
+    def attach(self, name):
+        """
+        Replaces Q-values and visits by views of the shared memory block created by share.
+        Required parameters: name as str
+        """
+
+        self.block = shared_memory.SharedMemory(name = name)
+        data = np.ndarray((2,) + self.q.shape, dtype = np.float64, buffer = self.block.buf)
+        self.q, self.visit = data[0], data[1]
+
+
+    def load(self, path, writable=True):
+        """
+        Imports Q-values and visits, preferably from the binary model (path.npy), otherwise from
+        the csv files of older models. Without any model the tables stay initialized at zero.
+        Read-only tables are memory-mapped, so that processes loading the same model share it.
+        Required parameters: path as str
+        Optional parameters: writable as bool
+        """
+
+        if os.path.exists(path + ".npy"):
+            self.load_binary(path, writable)
+        elif os.path.exists(path + "-q.csv"):
+            self.load_csv(path)
+        else:
+            print ("Existing model could not be found. New model is being created.")
+
+
+    def load_binary(self, path, writable=True):
+        """
+        Imports the binary model written by save. The header (see read_header) has to match the
+        state space version, the action order is adjusted if needed.
+        Required parameters: path as str
+        Optional parameters: writable as bool, loads a copy instead of a read-only memory map
+        """
+
+        header = self.read_header(path)
+
+        if header["format"] not in (1, MODEL_FORMAT):
+            raise ValueError(f'{path} has model format {header["format"]}, expected {MODEL_FORMAT}')
+
+        if (header["state_space"] != sar.STATE_SPACE_VERSION) or (header["states"] != len(self.space)):
+            raise ValueError(f'{path} was trained on state space version {header["state_space"]}, '
+                             f'expected {sar.STATE_SPACE_VERSION}')
+
+        data = np.load(path + ".npy", mmap_mode = None if writable else "r")
+
+        if header["actions"] != self.actions:
+            data = data[:, :, [header["actions"].index(action) for action in self.actions]]
+
+        self.q, self.visit = data[0], data[1]
+
+
+    def read_header(self, path):
+        """
+        Returns the header of the binary model path.npy. Format 2 appends the header to the
+        array data as json, followed by its length as 8 byte little-endian integer, which numpy
+        ignores when loading the array. Models of format 1 have no such trailer and keep the
+        header in path.json.
+        Required parameters: path as str
+        """
+
+        with open(path + ".npy", "rb") as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+
+            end  = file.tell() + int(np.prod(shape)) * dtype.itemsize
+            size = file.seek(0, os.SEEK_END)
+
+            if size > end:
+                file.seek(size - 8)
+                length = int.from_bytes(file.read(8), "little")
+                file.seek(size - 8 - length)
+                return json.loads(file.read(length))
+
+        if not os.path.exists(path + ".json"):
+            raise ValueError(f'{path}.npy has no model header and {path}.json does not exist')
+
+        with open(path + ".json") as file:
+            return json.load(file)
+
+
+    def save(self, path):
+        """
+        Exports Q-values and visits as binary model path.npy: both tables stacked as float64
+        array, followed by the header with format, state space version and action order (see
+        read_header). The file is replaced atomically, so readers never pair tables and header
+        of different versions and memory maps of a previous version stay valid.
+        Required parameters: path as str
+        """
+
+        header = json.dumps({"format"     : MODEL_FORMAT,
+                             "state_space": sar.STATE_SPACE_VERSION,
+                             "states"     : len(self.space),
+                             "actions"    : self.actions}).encode()
+
+        with open(path + ".npy.tmp", "wb") as file:
+            np.save(file, np.stack([self.q, self.visit]))
+            file.write(header)
+            file.write(len(header).to_bytes(8, "little"))
+
+        os.replace(path + ".npy.tmp", path + ".npy")
+
+
+    def load_csv(self, path):
+        """
+        Imports Q-values and visits from the csv files written by save_csv.
+        Rows are matched by their state tuple, so the row order of the files does not matter.
+        Required parameters: path as str
+        """
+
+        for table, suffix in [(self.q, "-q.csv"), (self.visit, "-visits.csv")]:
+            frame = pd.read_csv(path + suffix, sep = ";", index_col = "Unnamed: 0")
+            rows  = self.state_lut[[se.encode(ast.literal_eval(x)) for x in frame.index]]
+            table[rows] = frame[self.actions].to_numpy(dtype = np.float64)
+
+
+    def save_csv(self, path):
+        """
+        Exports Q-values and visits as csv files with the state tuples as index.
+        Required parameters: path as str
+        """
+
+        self.to_frame(self.q).to_csv(path + "-q.csv", sep = ";")
+        self.to_frame(self.visit).to_csv(path + "-visits.csv", sep = ";")
+
+
+    def to_frame(self, table):
+        """
+        Returns a pandas view of one of the tables, indexed by state tuples.
+        Required parameters: table as np.ndarray
+        """
+
+        index = pd.Index(self.space.tuples(), tupleize_cols = False)
+        return pd.DataFrame(data = table, columns = self.actions, index = index)
@@ -0,0 +1,71 @@
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+import numpy as np
+
+
+# 2. Replay Buffer
+# -------------------------------------------------------------------------
+
+class ReplayBuffer(object):
+    """
+    Preallocated ring buffer of transitions (state, action, next_state, next_action) as ids
+    of the Q-table. Transitions that were recorded but not learned yet are pending; once
+    learned, they stay available for replay until they are overwritten.
+    """
+
+    def __init__(self, capacity):
+        """
+        Required parameters: capacity as int
+        """
+
+        self.capacity    = capacity
+        self.state       = np.zeros(capacity, dtype = np.int32)
+        self.action      = np.zeros(capacity, dtype = np.int8)
+        self.next_state  = np.zeros(capacity, dtype = np.int32)
+        self.next_action = np.zeros(capacity, dtype = np.int8)
+
+        self.head    = 0
+        self.size    = 0
+        self.pending = 0
+
+
+    def record(self, state, action, next_state, next_action):
+        """
+        Records a transition. Returns True once all entries are pending, then the buffer has
+        to be learned before recording more.
+        """
+
+        i = self.head
+        self.state[i], self.action[i] = state, action
+        self.next_state[i], self.next_action[i] = next_state, next_action
+
+        self.head    = (i + 1) % self.capacity
+        self.size    = min(self.size + 1, self.capacity)
+        self.pending = self.pending + 1
+
+        return self.pending == self.capacity
+
+
+    def take_pending(self):
+        """
+        Returns the indices of the pending transitions in recording order and marks them learned.
+        """
+
+        idx = (self.head - self.pending + np.arange(self.pending)) % self.capacity
+        self.pending = 0
+        return idx
+
+
+    def sample(self, n, rng, weights=None):
+        """
+        Returns the indices of n transitions drawn from the buffer, uniformly or
+        proportional to weights (one per transition in the buffer).
+        """
+
+        p = None if weights is None else weights / weights.sum()
+        return rng.choice(self.size, size = n, p = p)
+
+
+    def transitions(self, idx):
+        return self.state[idx], self.action[idx], self.next_state[idx], self.next_action[idx]
@@ -0,0 +1,288 @@
+"""
+Streaming tournament results. A tournament played with environment.stream_tournament yields
+a record per game, which ResultWriter appends to a binary file in chunks and RunningStats
+aggregates online, so that evaluations of millions of games run in constant memory:
+
+    stats = results.run(10000000, agent1, agent2, seed = 0, path = "../assets/results/run.bin")
+    stats.win_rate(), stats.wilson(), stats.percentile(50)
+    records = results.read("../assets/results/run.bin")
+
+compare() plays a streaming tournament only until a sequential test decides which agent
+wins more often.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import environment as uno
+
+# Public libraries
+from statistics import NormalDist
+from math import log, sqrt
+import numpy as np
+import time
+import os
+
+
+# 2. Records
+# -------------------------------------------------------------------------
+
+# Record of a game: the winner (0 for agent1, 1 for agent2), turns and the seed of the game
+RECORD = np.dtype([("winner", "u1"), ("turns", "<u2"), ("seed", "<u8")])
+
+# Turns are stored as uint16, longer games are clipped
+MAX_TURNS = np.iinfo(np.uint16).max
+
+# Master seeds are limited to 32 bits, so that game_seed(seed, i) fits the uint64 seed of a record
+MAX_SEED = 2**32
+
+
+class ResultWriter(object):
+    """
+    Appends records to a binary file of RECORD structs, buffered in chunks of chunk_size
+    records. Seeds have to fit uint64, i.e. come from master seeds below MAX_SEED. The file is appended to, so a run can be continued or written by several writers
+    in turn. Missing parent directories are created. Use it as context manager or close it
+    to write the last chunk.
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+        self.file   = open(path, "ab")
+        self.buffer = np.zeros(chunk_size, dtype = RECORD)
+        self.n      = 0
+        self.count  = 0
+
+    def __call__(self, winner, turns, seed):
+        """
+        Adds a record, the signature of a sink of run().
+        """
+
+        self.buffer[self.n] = (winner, min(turns, MAX_TURNS), seed)
+        self.n += 1
+        self.count += 1
+        if self.n == len(self.buffer): self.flush()
+
+    def flush(self):
+        self.buffer[:self.n].tofile(self.file)
+        self.file.flush()
+        self.n = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read(path):
+    """
+    Returns the records of a result file as read-only memory-mapped structured array.
+    """
+
+    return np.memmap(path, dtype = RECORD, mode = "r")
+
+
+# 3. Running Statistics
+# -------------------------------------------------------------------------
+
+class RunningStats(object):
+    """
+    Aggregates of a stream of records updated in O(1) per game: the games, the wins of both
+    agents and a histogram of the turns, of fixed size as turns are clipped to MAX_TURNS.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins  = [0, 0]
+        self.turns = np.zeros(MAX_TURNS + 1, dtype = np.int64)
+
+    def __call__(self, winner, turns, seed=None):
+        """
+        Adds a record, the signature of a sink of run().
+        """
+
+        self.games += 1
+        self.wins[winner] += 1
+        self.turns[min(turns, MAX_TURNS)] += 1
+
+    def add_records(self, records):
+        """
+        Adds an array of RECORD, e.g. a result file read with read().
+        """
+
+        wins = int(records["winner"].sum())
+
+        self.games   += len(records)
+        self.wins[0] += len(records) - wins
+        self.wins[1] += wins
+        self.turns += np.bincount(records["turns"], minlength = len(self.turns))
+
+    def win_rate(self, agent=0):
+        return self.wins[agent] / self.games if self.games else 0.0
+
+    def wilson(self, agent=0, confidence=.95):
+        """
+        Wilson score interval of the win rate of agent at the given confidence.
+        """
+
+        if self.games == 0: return 0.0, 1.0
+
+        n, p = self.games, self.win_rate(agent)
+        z = NormalDist().inv_cdf(.5 + confidence/2)
+
+        center = (p + z*z/(2*n)) / (1 + z*z/n)
+        radius = z * sqrt(p*(1 - p)/n + z*z/(4*n*n)) / (1 + z*z/n)
+
+        return center - radius, center + radius
+
+    def mean_turns(self):
+        return float(np.arange(len(self.turns)) @ self.turns) / self.games if self.games else 0.0
+
+    def percentile(self, q):
+        """
+        The q-th percentile of the turns, read from the histogram.
+        """
+
+        if self.games == 0: return 0
+        return int(np.searchsorted(np.cumsum(self.turns), q/100 * self.games))
+
+    def summary(self, confidence=.95):
+        """
+        Returns the aggregates as dict.
+        """
+
+        return {"games"       : self.games,
+                "wins"        : list(self.wins),
+                "win_rate"    : self.win_rate(),
+                "interval"    : self.wilson(0, confidence),
+                "mean_turns"  : self.mean_turns(),
+                "median_turns": self.percentile(50),
+                "max_turns"   : int(np.flatnonzero(self.turns)[-1]) if self.games else 0}
+
+
+# 4. Streaming Tournament
+# -------------------------------------------------------------------------
+
+def run(iterations, agent1, agent2, seed=None, mirror=False, path=None, sinks=(), chunk_size=65536):
+    """
+    Plays a streaming tournament (see environment.stream_tournament) and returns its RunningStats.
+    Required parameters:
+        - iterations as int
+        - agent1, agent2 as agents or None
+    Optional parameters:
+        - seed as int, mirror as bool, as in uno.tournament, the seed in [0, 2**32) so that
+          the seeds of the games (see uno.game_seed) fit the uint64 of RECORD
+        - path as str, result file the records are appended to (see ResultWriter)
+        - sinks as list of functions called with winner, turns and seed of every game
+        - chunk_size as int, records per write to path
+    The time played is set as field timer of the returned stats.
+    """
+
+    if (seed is not None) and not (0 <= seed < MAX_SEED):
+        raise ValueError(f'Seed {seed} is out of range, results require a master seed in [0, 2**32)')
+
+    timer_start = time.time()
+
+    stats = RunningStats()
+    writer = ResultWriter(path, chunk_size) if path is not None else None
+    sinks = [stats] + list(sinks) + ([writer] if writer is not None else [])
+
+    try:
+        for record in uno.stream_tournament(iterations, agent1, agent2, seed, mirror):
+            for sink in sinks: sink(*record)
+
+    finally:
+        if writer is not None: writer.close()
+
+    stats.timer = time.time() - timer_start
+    return stats
+
+
+# 5. Sequential Comparison
+# -------------------------------------------------------------------------
+
+def sprt_bounds(alpha, beta):
+    """
+    Returns the lower and upper stopping bounds of the log-likelihood ratio of an SPRT with
+    error probabilities alpha (of accepting H1 under H0) and beta (of accepting H0 under H1).
+    """
+
+    return log(beta/(1 - alpha)), log((1 - beta)/alpha)
+
+
+def compare(agent1, agent2, confidence=.95, max_games=100000, seed=None, test="sprt", delta=.05, check=10):
+    """
+    Plays agent1 against agent2 until a sequential test decides with the given confidence
+    which agent wins more often, or until max_games. Games are played in pairs, so both
+    agents start equally often. The tests are:
+        - "sprt": two of Wald's sequential probability ratio tests of a win rate of agent1
+          of .5 against .5 + delta and against .5 - delta, checked after every pair. Once
+          both accept .5, the agents are called even.
+        - "wilson": stops when the Wilson interval of the win rate of agent1 excludes .5.
+          The interval is checked every check games, the k-th check at the confidence
+          1 - (1 - confidence)/(k(k+1)), so that the error over all checks stays within
+          1 - confidence.
+    Required parameters: agent1, agent2 as agents or None
+    Optional parameters:
+        - confidence as float (0, 1)
+        - max_games as int
+        - seed as int, as in uno.tournament
+        - test as str, "sprt" or "wilson"
+        - delta as float, the smallest difference of the win rate to .5 the SPRT detects
+        - check as int, games between checks of the Wilson interval, rounded up to pairs
+    Returns the RunningStats of the games played, with the fields decision (0 if agent1 wins
+    more often, 1 if agent2 does, -1 if they are even, None if undecided after max_games)
+    and timer; the number of games used is stats.games.
+    """
+
+    if test not in ("sprt", "wilson"):
+        raise ValueError(f'Unknown test {test}, expected "sprt" or "wilson"')
+
+    timer_start = time.time()
+
+    stats = RunningStats()
+    stats.decision = None
+
+    # Log-likelihood ratios of .5 + delta and of .5 - delta against .5, None once .5 is accepted
+    lower, upper = sprt_bounds((1 - confidence)/2, 1 - confidence)
+    up, down = log(1 + 2*delta), log(1 - 2*delta)
+    llr = [0.0, 0.0]
+
+    check = check + check%2
+    looks = 0
+
+    games = uno.stream_tournament(max_games, agent1, agent2, seed)
+    try:
+        for winner, turns, game in games:
+            stats(winner, turns)
+            if stats.games%2 == 1: continue
+
+            if test == "sprt":
+                for i in range(2):
+                    if llr[i] is None: continue
+                    llr[i] = stats.wins[i]*up + stats.wins[1 - i]*down
+
+                    if llr[i] >= upper: stats.decision = i
+                    elif llr[i] <= lower: llr[i] = None
+
+                if llr == [None, None]: stats.decision = -1
+
+            elif stats.games%check == 0:
+                looks += 1
+                low, high = stats.wilson(0, 1 - (1 - confidence)/(looks*(looks + 1)))
+                if low > .5: stats.decision = 0
+                elif high < .5: stats.decision = 1
+
+            if stats.decision is not None: break
+
+    finally:
+        games.close()
+
+    stats.timer = time.time() - timer_start
+    return stats
@@ -0,0 +1,37 @@
+"""
+Encodes the state of a player as a single integer. The code is the mixed-radix number
+of the state tuple in the dimension order of state_action_reward.states(), so sorting
+codes reproduces the ordering of the state space. The lookup table from a code to the
+row index of the pruned state space is built by state_space.generate.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+import numpy as np
+
+
+# 2. Constants
+# -------------------------------------------------------------------------
+
+COLORS = {"RED":0,"GRE":1,"BLU":2,"YEL":3}
+
+# Radix of each dimension: OPEN, 4 normal, 3 special, 2 wild, 4 normal playable, 3 special playable
+RADIX = (4, 3,3,3,3, 2,2,2, 2,2, 2,2,2,2, 2,2,2)
+SIZE  = int(np.prod(RADIX))
+
+
+# 3. Functions
+# -------------------------------------------------------------------------
+
+def encode(state):
+    """
+    Returns the mixed-radix code of a state tuple as produced by sar.states().
+    Required parameters: state as tuple
+    """
+
+    code = COLORS[state[0]]
+    for radix, digit in zip(RADIX[1:], state[1:]):
+        code = code*radix + digit
+
+    return code
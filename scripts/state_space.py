@@ -0,0 +1,126 @@
+"""
+The state space of the Q-learning agent as arrays. Valid states are generated directly in
+the order of the state codes of state_encoder, which is the order in which
+state_action_reward.states() has always listed them, so a state's row index is its state id.
+The state space is memoized per process and kept on disk, so creating agents, for instance
+in every worker of a pool, only loads three arrays.
+"""
+
+# 1. Libraries
+# -------------------------------------------------------------------------
+
+# Custom libraries
+import state_encoder as se
+
+# Public libraries
+import numpy as np
+import functools
+import os
+
+
+# 2. Constants
+# -------------------------------------------------------------------------
+
+# Version of the state space, to be increased whenever its states or their order change
+VERSION = 1
+
+# Directory of the on-disk state space artifact
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "cache")
+
+# Playable dimensions can not exceed the matching hand dimension, e.g. RED# <= RED
+BOUND_BY = {10: 1, 11: 2, 12: 3, 13: 4, 14: 5, 15: 6, 16: 7}
+
+# Place value of each digit of a state code
+PLACES = np.array([int(np.prod(se.RADIX[d+1:])) for d in range(len(se.RADIX))], dtype = np.int64)
+
+
+# 3. State Space
+# -------------------------------------------------------------------------
+
+class StateSpace(object):
+    """
+    States as int8 array with one row per state (the open color as index into
+    state_encoder.COLORS), the lookup table from state code to state id and the reward of
+    each state, which is 1 for an empty hand.
+    """
+
+    def __init__(self, states, lut, rewards):
+        self.states  = states
+        self.lut     = lut
+        self.rewards = rewards
+
+
+    def __len__(self):
+        return len(self.states)
+
+
+    def tuples(self):
+        """
+        Returns the states as list of tuples, as listed by state_action_reward.states().
+        """
+
+        colors = list(se.COLORS)
+        return [(colors[s[0]],) + tuple(s[1:]) for s in self.states.tolist()]
+
+
+    def reward_matrix(self, n_actions):
+        """
+        Returns a read-only view of the rewards for every state and action.
+        """
+
+        return np.broadcast_to(self.rewards[:, None], (len(self.states), n_actions))
+
+
+def generate():
+    """
+    Generates the state space directly: each dimension expands every partial state by
+    the values it can take, in increasing order, so no state is rejected afterwards.
+    """
+
+    states = np.zeros((1, 0), dtype = np.int8)
+
+    for d, radix in enumerate(se.RADIX):
+        if d in BOUND_BY:
+            counts = np.minimum(states[:, BOUND_BY[d]], radix - 1).astype(np.int64) + 1
+        else:
+            counts = np.full(len(states), radix, dtype = np.int64)
+
+        digits = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        states = np.column_stack([np.repeat(states, counts, axis = 0), digits]).astype(np.int8)
+
+    codes = states.astype(np.int64) @ PLACES
+    lut = np.full(se.SIZE, -1, dtype = np.int32)
+    lut[codes] = np.arange(len(states), dtype = np.int32)
+
+    rewards = (states[:, 1:10].sum(axis = 1) == 0).astype(np.float64)
+
+    return StateSpace(states, lut, rewards)
+
+
+@functools.lru_cache(maxsize = None)
+def load():
+    """
+    Returns the state space, memoized in the process. The arrays are read from the
+    artifact in CACHE_DIR and generated and stored there if it does not exist yet.
+    """
+
+    path = os.path.join(CACHE_DIR, f'state_space-v{VERSION}.npz')
+
+    try:
+        with np.load(path) as file:
+            return StateSpace(file["states"], file["lut"], file["rewards"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    space = generate()
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok = True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, "wb") as file:
+            np.savez(file, states = space.states, lut = space.lut, rewards = space.rewards)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+    return space
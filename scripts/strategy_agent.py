@@ -3,6 +3,7 @@ Strategic agent uses domain-expertise to semi-intelligently calculate Q values,
 with hyper-parameters that can be trained intelligently
 """
 
+import environment as uno
 import pickle
 
 class StrategicAgent:
@@ -77,18 +78,19 @@ class StrategicAgent:
     """
     def getGravity(self, card, player):
         x, y, a, b = 0, 0, 1, 1
+        color = card.color
 
+        # A wild card takes the chosen color and counts itself for that color
         if card.value in ["PL4", "COL"]:
-            card.color = player.choose_color()
+            color = player.choose_color()
+            x += 1
 
-        for h_card in player.hand:
-            if card.color == h_card.color:
-                x += 1
-            if card.value == h_card.value:
-                y += 1
+        # Hand cards of the same color and value, read from the players' hand index
+        x += player.color_count[uno.COLOR_CODE[color]]
+        y += player.value_count[uno.VALUE_CODE[card.value]]
 
-        if card.color in self.color_count:
-            a += self.color_count[card.color]
+        if color in self.color_count:
+            a += self.color_count[color]
 
         if card.value in self.value_count:
             b += self.value_count[card.value]
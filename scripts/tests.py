@@ -1,6 +1,15 @@
 import environment as uno
 import q_learning_agent as rlagent
 import strategy_agent as sagent
+import game_state as gs
+import genetic_search as genetic
+import state_action_reward as sar
+from q_table import QTable
+import numpy as np
+import contextlib
+import tempfile
+import random
+import os
 
 # Q-Learning Agent parameters
 q_agent_info = {"epsilon"  : .1,
@@ -28,4 +37,85 @@ run = uno.tournament(iterations = 100,
                      comment = False)
 
 
-print(run[0].count("q-learning"))
\ No newline at end of file
+print(run[0].count("q-learning"))
+
+# Seeded checks of the guarantees of the engine, cheap enough to run after every change
+
+# Seeded results of the strategic agent against the random player, update them only
+# together with an intended change of the rules or of the random numbers drawn
+run = uno.tournament(200, s_agent, None, False, seed = 1)
+assert (run[0].count("strategic"), sum(run[1])) == (101, 8705)
+
+# Narration does not change the course of a game
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    narrated = uno.tournament(10, s_agent, None, True, seed = 1)
+assert narrated[:2] == uno.tournament(10, s_agent, None, False, seed = 1)[:2]
+
+# Parallel tournaments play the same games for any number of workers and chunks
+assert run[:2] == uno.parallel_tournament(200, s_agent, None, seed = 1, workers = 2, chunk_size = 37)[:2]
+
+# Game states replay the games of random players
+for i in range(200):
+    random.seed(uno.game_seed(1, i))
+    state = gs.deal()
+    gs.rollout(state, [gs.random_policy]*2)
+
+    random.seed(uno.game_seed(1, i))
+    game = uno.Game(uno.Player(None), uno.Player(None), False)
+    assert state.turn_no == game.turn_no
+    assert [len(hand) for hand in state.hands] == [len(game.player_1.hand), len(game.player_2.hand)]
+
+# Hoeffding racing drops individuals that clearly lose: the struggle wins each of its games
+# with the probability of the first parameter of the genome, which varies widely
+class SkillFitness:
+    games = 50
+
+    def __call__(self, agent, seed=None):
+        rng = random.Random(seed)
+        p = min(max(agent.h[0], 0), 1)
+        return (sum(rng.random() < p for i in range(self.games)), agent)
+
+random.seed(0)
+adam = sagent.StrategicAgent({"model": None, "parameters": [.5]*12})
+search = genetic.GeneticSearch(adam, 1, 40, SkillFitness(), carryover = 4, common_seeds = True,
+                               racing = "hoeffding", race_rounds = 8)
+assert search.evaluations < 40 * 8
+
+# Binary models load back unchanged, as writable copy and as read-only memory map
+table = QTable(sar.actions())
+table.q[:] = np.random.default_rng(0).random(table.q.shape)
+table.visit[:] = np.random.default_rng(1).integers(0, 10, table.visit.shape)
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "model")
+    table.save(path)
+    for writable in [True, False]:
+        loaded = QTable(sar.actions(), table.space)
+        loaded.load(path, writable)
+        assert (loaded.q == table.q).all() and (loaded.visit == table.visit).all()
+        assert loaded.q.flags.writeable == writable
+        del loaded
+
+# Batch updates equal sequential Bellman updates for constant targets, here gamma = 0, for a
+# fixed and for the decaying alpha, from pairs not yet visited and from pairs visited before
+rng = np.random.default_rng(2)
+for alpha in [.1, 0]:
+    table = QTable(sar.actions())
+    table.R = rng.standard_normal(table.q.shape)
+    counts = [(k, visits) for k in [1, 2, 5, 30] for visits in [0, 1, 3, 25]]
+    pairs = [(i, i % 5, 3 * i, i % 3, k, visits) for i, (k, visits) in enumerate(counts)]
+
+    expected = dict()
+    for state, action, next_state, next_action, k, visits in pairs:
+        table.q[state, action] = q = rng.standard_normal()
+        table.visit[state, action] = visits
+        for j in range(k):
+            step = alpha if alpha != 0 else max(1.0 / (visits + j) if visits + j != 0 else .99, .05)
+            q = (1 - step) * q + step * table.R[next_state, next_action]
+        expected[state, action] = (q, visits + k)
+
+    batch = np.array([pair[:4] for pair in pairs for j in range(pair[4])]).T
+    table.batch_update(*batch, 0, alpha)
+    for (state, action), (q, visits) in expected.items():
+        assert np.isclose(table.q[state, action], q) and table.visit[state, action] == visits
+
+print("all checks passed")
@@ -7,8 +7,18 @@ import environment as uno
 import strategy_agent as sagent
 import q_learning_agent as qagent
 import genetic_search as genetic
+import parallel_training
 import time
 
+# Actor processes playing the training games of the q-learning agents,
+# with more than one the games are played in parallel (see parallel_training.py)
+ACTORS = 1
+
+def train(iterations, agent1, agent2):
+    if ACTORS > 1:
+        return parallel_training.train(iterations, agent1, agent2, workers = ACTORS)
+    return uno.tournament(iterations, agent1, agent2, False)
+
 start_time = time.time()
 
 """
@@ -27,10 +37,9 @@ agent_info = {"epsilon"  : .1,
 q_v_rand = qagent.QLearningAgent(agent_info)
 
 # Run simulations
-run = uno.tournament(iterations = 100000,
-                     agent1 = q_v_rand,
-                     agent2 = None, #random strategy agent
-                     comment = False)
+run = train(iterations = 100000,
+            agent1 = q_v_rand,
+            agent2 = None) #random strategy agent
 
 end_time = time.time()
 timer = end_time - train_time
@@ -57,10 +66,9 @@ q_v_strat = qagent.QLearningAgent(agent_info)
 unopt_strat = sagent.StrategicAgent({"model": "../assets/models/strat_unopt/model", "parameters": "models"})
 
 # Run simulations
-run = uno.tournament(iterations = 100000,
-                     agent1 = q_v_strat,
-                     agent2 = unopt_strat,
-                     comment = False)
+run = train(iterations = 100000,
+            agent1 = q_v_strat,
+            agent2 = unopt_strat)
 
 end_time = time.time()
 timer = end_time - train_time